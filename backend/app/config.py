@@ -23,6 +23,62 @@ class Settings(BaseSettings):
     SPOTIFY_CLIENT_SECRET: Optional[str] = None
     SPOTIFY_REDIRECT_URI: Optional[str] = None
     
+    # Embeddings (leave the address unset to load the model in each worker)
+    EMBEDDING_WORKER_ADDRESS: Optional[str] = None  # "host:port" or a Unix socket path
+    EMBEDDING_WORKER_AUTHKEY: Optional[str] = None  # defaults to SECRET_KEY
+    
+    # Buddy matching index
+    BUDDY_INDEX_BACKEND: str = "ivf"  # brute, ivf, hnsw (needs hnswlib), mmap (quantized, memory-mapped)
+    BUDDY_EMBEDDING_DTYPE: str = "int8"  # mmap backend storage: float32, float16, int8 (smaller = slower queries)
+    BUDDY_INDEX_PATH: str = "data/buddy_index.npz"
+    BUDDY_INDEX_NPROBE: int = 8
+    BUDDY_INDEX_SYNC_SECONDS: int = 30
+    BUDDY_CANDIDATE_POOL: int = 50
+    BUDDY_PRECOMPUTE_TOP_K: int = 50
+    BUDDY_PRECOMPUTE_INTERVAL_MINUTES: int = 0  # 0 disables the in-process scheduler
+    BUDDY_PRECOMPUTE_LOCK_PATH: str = "data/buddy_precompute.lock"  # only the worker holding it runs the scheduler
+    BUDDY_EXPLANATION_CONCURRENCY: int = 4
+    BUDDY_EXPLANATION_TIMEOUT: float = 8.0  # seconds per LLM call
+    EXPLANATION_CACHE_SIZE: int = 1024  # in-process LRU entries
+    EXPLANATION_CACHE_TTL_HOURS: int = 168
+    
+    # Uploads
+    MAX_VOICE_UPLOAD_MB: int = 200
+    MAX_RESOURCE_UPLOAD_MB: int = 50
+    
+    # Audio ingest (re-encodes uploads with ffmpeg before transcription)
+    AUDIO_NORMALIZE: bool = True
+    AUDIO_SAMPLE_RATE: int = 16000
+    AUDIO_BITRATE: str = "24k"
+    
+    # Transcription
+    TRANSCRIBER: str = "groq"  # groq, stub (offline, for tests)
+    TRANSCRIPTION_CHUNK_SECONDS: int = 600  # longer recordings are split (needs ffmpeg)
+    TRANSCRIPTION_OVERLAP_SECONDS: int = 5
+    TRANSCRIPTION_CONCURRENCY: int = 4
+    TRANSCRIPTION_CHUNK_RETRIES: int = 1
+    
+    # Summaries (transcripts longer than one section are summarized map-reduce style)
+    SUMMARY_SECTION_TOKENS: int = 3000
+    SUMMARY_CONCURRENCY: int = 4
+    
+    # Semantic voice note search
+    VOICE_SEARCH_CHUNK_WORDS: int = 120
+    VOICE_SEARCH_CHUNK_OVERLAP_WORDS: int = 20
+    VOICE_SEARCH_CACHE_USERS: int = 256  # per-user indexes kept in memory
+    
+    # Voice note processing queue
+    VOICE_JOB_WORKERS: int = 2  # 0 disables the in-process worker pool
+    VOICE_JOB_MAX_ATTEMPTS: int = 3
+    VOICE_JOB_RETRY_SECONDS: int = 15  # first retry delay, doubled per attempt
+    VOICE_JOB_RETRY_MAX_SECONDS: int = 900
+    VOICE_JOB_POLL_SECONDS: float = 2.0
+    VOICE_JOB_STALE_MINUTES: int = 30  # requeue running jobs whose worker died
+    
+    # Marketplace download counters (buffered in memory, written in batches)
+    DOWNLOAD_FLUSH_SECONDS: float = 5.0  # 0 writes every download through immediately
+    DOWNLOAD_FLUSH_THRESHOLD: int = 200  # flush early once this many downloads are buffered
+    
     # Application
     BACKEND_URL: str = "http://localhost:8000"
     FRONTEND_URL: str = "http://localhost:3000"
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
@@ -25,6 +25,48 @@ def get_db():
         db.close()
 
 
+def add_missing_columns():
+    """Add columns declared on models but missing from existing tables.
+
+    Columns are added as nullable; existing rows get the column's string
+    server default, or NULL without one.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                default = getattr(column.server_default, "arg", None)
+                if isinstance(default, str):
+                    ddl += " DEFAULT '{}'".format(default.replace("'", "''"))
+                connection.execute(text(ddl))
+                print(f"Added column {table.name}.{column.name}")
+
+
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
+    
+    # create_all never alters existing tables, so add newly declared columns
+    add_missing_columns()
+    
+    # create_all skips tables that already exist, so add any newly declared indexes
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except Exception as e:
+                # e.g. a new unique index over rows that already hold duplicates
+                print(f"Error creating index {index.name}: {e}")
+    
+    # Full-text indexes live outside the ORM metadata (FTS5 tables / tsvector columns)
+    from .utils.fulltext import ensure_fulltext_indexes
+    ensure_fulltext_indexes(engine)
@@ -2,8 +2,12 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from .config import settings
-from .database import init_db
+from .database import init_db, SessionLocal
 from .routers import auth, users, buddy, voice, ambient, location, playlist, marketplace
+from .services.buddy_matching_service import BuddyMatchingService
+from .services.buddy_recommendation_service import BuddyRecommendationService
+from .services.voice_job_service import VoiceJobService
+from .services.download_counter_service import DownloadCounterService
 import os
 
 # Create FastAPI app
@@ -43,9 +47,42 @@ async def startup_event():
     """Initialize database on startup"""
     init_db()
     print("✅ Database initialized")
+    
+    # Load the study buddy index so the first match request doesn't pay for it
+    db = SessionLocal()
+    try:
+        index = BuddyMatchingService.load_index(db)
+        print(f"✅ Buddy index loaded ({len(index)} profiles)")
+    except Exception as e:
+        print(f"Error loading buddy index: {e}")
+    finally:
+        db.close()
+    
+    # Periodically precompute buddy candidates in the background
+    if settings.BUDDY_PRECOMPUTE_INTERVAL_MINUTES > 0:
+        BuddyRecommendationService.start_scheduler(settings.BUDDY_PRECOMPUTE_INTERVAL_MINUTES)
+    
+    # Drain the voice note processing queue
+    if settings.VOICE_JOB_WORKERS > 0:
+        VoiceJobService.start_workers(settings.VOICE_JOB_WORKERS)
+        print(f"✅ Voice note workers started ({settings.VOICE_JOB_WORKERS})")
+    
+    # Batch download counter writes instead of updating hot rows on every download
+    if settings.DOWNLOAD_FLUSH_SECONDS > 0:
+        DownloadCounterService.start_flusher(settings.DOWNLOAD_FLUSH_SECONDS)
+    
     print(f"📚 Study Planner API running on {settings.BACKEND_URL}")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Persist in-memory state on shutdown"""
+    BuddyRecommendationService.stop_scheduler()
+    VoiceJobService.stop_workers()
+    DownloadCounterService.stop_flusher()
+    BuddyMatchingService.save_index()
+
+
 @app.get("/")
 def root():
     """API root endpoint"""
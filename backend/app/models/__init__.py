@@ -1,17 +1,32 @@
 from .user import User
 from .voice_note import VoiceNote
+from .voice_note_job import VoiceNoteJob
+from .voice_note_chunk import VoiceNoteChunk
+from .voice_note_section import VoiceNoteSection
+from .voice_cache import CachedTranscription, CachedSummary
 from .study_session import StudySession, UserStreak
 from .location_log import LocationLog
 from .playlist import Playlist
 from .buddy_match import BuddyMatch, StudyGroup
+from .buddy_candidate import BuddyCandidate
+from .user_embedding import UserEmbedding
+from .explanation_cache import CachedExplanation
 
 __all__ = [
     "User",
     "VoiceNote",
+    "VoiceNoteJob",
+    "VoiceNoteChunk",
+    "VoiceNoteSection",
+    "CachedTranscription",
+    "CachedSummary",
     "StudySession",
     "UserStreak",
     "LocationLog",
     "Playlist",
     "BuddyMatch",
-    "StudyGroup"
+    "StudyGroup",
+    "BuddyCandidate",
+    "UserEmbedding",
+    "CachedExplanation"
 ]
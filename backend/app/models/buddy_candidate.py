@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Index
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class BuddyCandidate(Base):
+    """Precomputed study buddy candidate, refreshed by the background job"""
+    __tablename__ = "buddy_candidates"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    candidate_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    
+    # Ranking
+    score = Column(Float, nullable=False)  # cosine similarity
+    rank = Column(Integer, nullable=False)  # 0 = best
+    top_k = Column(Integer)  # list length the job asked for; a shorter list holds every candidate
+    
+    # Profile hash of user_id when the list was computed (stale if it changed)
+    profile_hash = Column(String(64), nullable=False)
+    
+    # Timestamps
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        # Unique, so overlapping precompute runs can't leave a user with two lists
+        Index("uq_buddy_candidates_user_rank", "user_id", "rank", unique=True),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Text, Index
 from sqlalchemy.sql import func
 from ..database import Base
 
@@ -22,6 +22,12 @@ class BuddyMatch(Base):
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    __table_args__ = (
+        # Existing-match lookups in both directions
+        Index("ix_buddy_matches_user_matched", "user_id", "matched_user_id"),
+        Index("ix_buddy_matches_matched_user", "matched_user_id", "user_id"),
+    )
 
 
 class StudyGroup(Base):
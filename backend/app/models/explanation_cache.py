@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, DateTime, Text
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class CachedExplanation(Base):
+    """Persistent tier of the buddy match explanation cache"""
+    __tablename__ = "match_explanation_cache"
+    
+    # SHA-256 of the normalized prompt inputs
+    cache_key = Column(String(64), primary_key=True)
+    explanation = Column(Text, nullable=False)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
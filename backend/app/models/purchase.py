@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Index
 from sqlalchemy.sql import func
 from ..database import Base
 
@@ -25,3 +25,8 @@ class Purchase(Base):
     # Timestamps
     purchased_at = Column(DateTime(timezone=True), server_default=func.now())
     completed_at = Column(DateTime(timezone=True))
+    
+    __table_args__ = (
+        # Already-purchased / download access checks, and a buyer's purchase history
+        Index("ix_purchases_buyer_unit_status", "buyer_id", "resource_unit_id", "payment_status"),
+    )
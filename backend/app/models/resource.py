@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean, ForeignKey, Index
 from sqlalchemy.sql import func
 from ..database import Base
+from ..utils.fulltext import FullTextIndex
 
 
 class Resource(Base):
@@ -24,6 +25,7 @@ class Resource(Base):
     total_downloads = Column(Integer, default=0)
     average_rating = Column(Float, default=0.0)
     total_reviews = Column(Integer, default=0)
+    rating_sum = Column(Integer, default=0)  # sum of all ratings; NULL until first maintained (pre-existing rows)
     
     # Moderation
     is_approved = Column(Boolean, default=True)  # Set to False for manual moderation
@@ -32,3 +34,20 @@ class Resource(Base):
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    __table_args__ = (
+        # Marketplace browse pages, one per sort order (keyset on sort column + id)
+        Index("ix_resources_browse_recent", "is_active", "is_approved", "created_at", "id"),
+        Index("ix_resources_browse_popular", "is_active", "is_approved", "total_downloads", "id"),
+        Index("ix_resources_browse_rating", "is_active", "is_approved", "average_rating", "id"),
+        Index("ix_resources_user_created", "user_id", "created_at"),  # a seller's uploads
+    )
+
+
+# Marketplace search: title matches rank highest
+resource_search = FullTextIndex(
+    "resources",
+    {"title": "A", "subject": "B", "category": "B", "description": "C"},
+    snippet_columns=["title", "description"],
+    prefix_index=True  # unstemmed index for type-ahead prefixes
+)
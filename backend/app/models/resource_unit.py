@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, Boolean, ForeignKey, Index
 from sqlalchemy.sql import func
 from ..database import Base
 
@@ -34,3 +34,7 @@ class ResourceUnit(Base):
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    __table_args__ = (
+        Index("ix_resource_units_resource_number", "resource_id", "unit_number"),  # unit listings
+    )
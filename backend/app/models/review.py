@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.sql import func
 from ..database import Base
 
@@ -22,3 +22,8 @@ class Review(Base):
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    __table_args__ = (
+        Index("ix_reviews_resource_approved_created", "resource_id", "is_approved", "created_at"),  # review pages
+        Index("ix_reviews_user_resource", "user_id", "resource_id"),  # one review per user check
+    )
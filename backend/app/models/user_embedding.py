@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, LargeBinary
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class UserEmbedding(Base):
+    """Cached study-profile embedding for buddy matching"""
+    __tablename__ = "user_embeddings"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    
+    # Hash of the profile text (and model) the vector was computed from
+    profile_hash = Column(String(64), nullable=False)
+    
+    # Embedding data
+    embedding = Column(LargeBinary, nullable=False)  # float32 bytes
+    dimension = Column(Integer, nullable=False)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, DateTime, Text
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class CachedTranscription(Base):
+    """Transcript of an audio file, keyed by its content hash"""
+    __tablename__ = "transcription_cache"
+    
+    # SHA-256 of the transcriber name and the audio file's SHA-256
+    cache_key = Column(String(64), primary_key=True)
+    transcription = Column(Text, nullable=False)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class CachedSummary(Base):
+    """Summary of a transcript, keyed by the transcript hash and prompt version"""
+    __tablename__ = "summary_cache"
+    
+    # SHA-256 of the prompt version, model and transcript text
+    cache_key = Column(String(64), primary_key=True)
+    summary = Column(Text, nullable=False)
+    key_points = Column(Text, nullable=False)  # JSON string
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
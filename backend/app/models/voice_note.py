@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text, Index
 from sqlalchemy.sql import func
 from ..database import Base
+from ..utils.fulltext import FullTextIndex
 
 
 class VoiceNote(Base):
@@ -13,11 +14,15 @@ class VoiceNote(Base):
     filename = Column(String, nullable=False)
     file_path = Column(String, nullable=False)
     duration = Column(Float)  # in seconds
+    original_size = Column(Integer)  # bytes as uploaded (set once the audio is ingested)
+    stored_size = Column(Integer)  # bytes after re-encoding to 16 kHz mono Opus
+    audio_sha256 = Column(String(64), index=True)  # content hash of the uploaded file
     
     # Processing results
     transcription = Column(Text)
     summary = Column(Text)
     key_points = Column(Text)  # JSON string
+    status = Column(String(20), nullable=False, default="completed", server_default="completed")  # pending, processing, completed, failed
     
     # Metadata
     subject = Column(String)
@@ -26,3 +31,15 @@ class VoiceNote(Base):
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     processed_at = Column(DateTime(timezone=True))
+    
+    __table_args__ = (
+        Index("ix_voice_notes_user_created", "user_id", "created_at", "id"),  # library pages
+    )
+
+
+# Library search: summary and key points rank above raw transcript matches
+voice_note_search = FullTextIndex(
+    "voice_notes",
+    {"summary": "A", "key_points": "B", "tags": "B", "transcription": "C"},
+    snippet_columns=["summary", "transcription"]
+)
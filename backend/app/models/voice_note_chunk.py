@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Text, LargeBinary, Index
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class VoiceNoteChunk(Base):
+    """Embedded transcript passage for semantic voice note search"""
+    __tablename__ = "voice_note_chunks"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    voice_note_id = Column(Integer, ForeignKey("voice_notes.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # denormalized for per-user search
+    
+    # Passage
+    chunk_index = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False)
+    start_seconds = Column(Float)  # estimated from word position when the duration is known
+    end_seconds = Column(Float)
+    
+    # Embedding data
+    embedding = Column(LargeBinary, nullable=False)  # float32 bytes
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index("ix_voice_note_chunks_user_id", "user_id", "id"),
+    )
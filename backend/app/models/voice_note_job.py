@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class VoiceNoteJob(Base):
+    """Queued transcription/summary work for a voice note, run by the local worker pool"""
+    __tablename__ = "voice_note_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    voice_note_id = Column(Integer, ForeignKey("voice_notes.id"), nullable=False, index=True)
+    
+    # Queue state
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, succeeded, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    last_error = Column(Text)
+    worker = Column(String)  # name of the worker thread holding the job
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    run_after = Column(DateTime(timezone=True), nullable=False)  # backoff: not claimable before this
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    
+    __table_args__ = (
+        Index("ix_voice_note_jobs_status_run_after", "status", "run_after"),
+    )
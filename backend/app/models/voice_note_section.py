@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class VoiceNoteSection(Base):
+    """Summary of one section of a long transcript (map step of the summarizer)"""
+    __tablename__ = "voice_note_sections"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    voice_note_id = Column(Integer, ForeignKey("voice_notes.id"), nullable=False, index=True)
+    section_index = Column(Integer, nullable=False)
+    
+    # SHA-256 of the prompt version, model and section text; equal sections reuse the summary
+    content_hash = Column(String(64), nullable=False, index=True)
+    summary = Column(Text, nullable=False)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -5,6 +5,8 @@ from ..database import get_db
 from ..models.user import User
 from ..schemas.feature_schemas import BuddyMatchResponse
 from ..services.buddy_matching_service import BuddyMatchingService
+from ..services.explanation_cache_service import ExplanationCacheService
+from ..services.buddy_recommendation_service import BuddyRecommendationService
 from ..models.buddy_match import BuddyMatch
 import json
 
@@ -111,3 +113,15 @@ def decline_match(match_id: int, db: Session = Depends(get_db)):
     db.commit()
     
     return {"message": "Match declined", "status": "declined"}
+
+
+@router.get("/explanation-cache/stats")
+def get_explanation_cache_stats():
+    """Hit/miss counters for the match explanation cache"""
+    return ExplanationCacheService.get_stats()
+
+
+@router.get("/precompute/status")
+def get_precompute_status():
+    """Metrics from the last background candidate precompute run"""
+    return BuddyRecommendationService.last_run or {"status": "never run"}
@@ -1,11 +1,12 @@
 import os
 import json
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Response
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from decimal import Decimal
 
+from ..config import settings
 from ..database import get_db
 from ..models.user import User
 from ..models.resource import Resource
@@ -18,6 +19,8 @@ from ..schemas.resource_schemas import (
     WalletResponse
 )
 from ..services.resource_service import ResourceService
+from ..services.download_counter_service import DownloadCounterService
+from ..utils.uploads import save_upload_file
 
 router = APIRouter(prefix="/api/marketplace", tags=["Resource Marketplace"])
 
@@ -71,6 +74,7 @@ def create_resource(
 
 @router.get("/resources", response_model=List[ResourceResponse])
 def browse_resources(
+    response: Response,
     subject: Optional[str] = None,
     category: Optional[str] = None,
     search: Optional[str] = None,
@@ -78,19 +82,27 @@ def browse_resources(
     sort_by: str = "recent",
     limit: int = 20,
     offset: int = 0,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Browse marketplace with filters"""
-    resources = ResourceService.browse_resources(
+    """Browse marketplace with filters
+    
+    The cursor for the next page is returned in the X-Next-Cursor header;
+    pass it back as `cursor` instead of growing `offset`.
+    """
+    resources, next_cursor = ResourceService.browse_resources(
         db=db,
         subject=subject,
         category=category,
         search=search,
         min_rating=min_rating,
         sort_by=sort_by,
-        limit=limit,
-        offset=offset
+        limit=min(max(limit, 1), 100),
+        offset=offset,
+        cursor=cursor
     )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return resources
 
 
@@ -189,11 +201,9 @@ async def add_unit(
     if file_ext not in allowed_extensions:
         raise HTTPException(status_code=400, detail="Invalid file type")
     
-    # Save file
+    # Save file (streamed to disk in chunks)
     file_path = os.path.join(UPLOAD_DIR, f"{resource_id}_unit{unit_number}_{file.filename}")
-    with open(file_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
+    saved = await save_upload_file(file, file_path, settings.MAX_RESOURCE_UPLOAD_MB * 1024 * 1024)
     
     # Create unit
     unit = ResourceService.add_unit(
@@ -203,7 +213,7 @@ async def add_unit(
         title=title,
         file_path=file_path,
         file_name=file.filename,
-        file_size=len(content),
+        file_size=saved.size,
         file_type=file_ext[1:],  # Remove the dot
         price=price,
         description=description
@@ -243,9 +253,8 @@ async def download_unit(
     if not has_access:
         raise HTTPException(status_code=403, detail="Purchase required to access this unit")
     
-    # Increment download count
-    unit.download_count += 1
-    db.commit()
+    # Increment download count (buffered, written in batches)
+    DownloadCounterService.record(unit.id, unit.resource_id)
     
     # Return file
     if not os.path.exists(unit.file_path):
@@ -324,11 +333,7 @@ def get_resource_reviews(
     db: Session = Depends(get_db)
 ):
     """Get all reviews for a resource"""
-    from ..models.review import Review
-    reviews = db.query(Review).filter(
-        Review.resource_id == resource_id,
-        Review.is_approved == True
-    ).order_by(Review.created_at.desc()).all()
+    reviews = ResourceService.get_resource_reviews(db, resource_id)
     return reviews
 
 
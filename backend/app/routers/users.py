@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from ..database import get_db
 from ..models.user import User
 from ..schemas.user_schema import UserResponse, UserWithProfile, UserProfile
+from ..services.buddy_matching_service import BuddyMatchingService
 from ..utils.dependencies import get_current_user
 
 router = APIRouter(prefix="/api/users", tags=["Users"])
@@ -33,6 +34,9 @@ def update_profile(
     current_user.weaknesses = json.dumps(profile.weaknesses)
     current_user.study_patterns = json.dumps(profile.study_patterns)
     
+    # Re-embed the profile for buddy matching (no-op if nothing changed)
+    BuddyMatchingService.refresh_user_embedding(db, current_user)
+    
     db.commit()
     db.refresh(current_user)
     
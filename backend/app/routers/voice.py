@@ -1,12 +1,17 @@
 import os
 import json
+import uuid
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from ..config import settings
 from ..database import get_db
 from ..models.user import User
-from ..schemas.feature_schemas import VoiceNoteResponse
+from ..schemas.feature_schemas import VoiceNoteResponse, VoiceNoteQuestion
 from ..services.voice_note_service import VoiceNoteService
+from ..services.voice_job_service import VoiceJobService
+from ..services.voice_search_service import VoiceSearchService
+from ..utils.uploads import save_upload_file
 
 router = APIRouter(prefix="/api/voice", tags=["Voice Notes"])
 
@@ -81,7 +86,7 @@ async def upload_voice_note(
     tags: Optional[str] = Form(None),
     db: Session = Depends(get_db)
 ):
-    """Upload and process a voice note (no auth required for demo)"""
+    """Upload a voice note and queue it for transcription (no auth required for demo)"""
     from fastapi.responses import JSONResponse
     
     # Use demo user
@@ -97,24 +102,26 @@ async def upload_voice_note(
             detail=f"Invalid file type. Allowed: {', '.join(allowed_extensions)}"
         )
     
-    # Save file
-    file_path = os.path.join(UPLOAD_DIR, f"{current_user.id}_{file.filename}")
-    with open(file_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
+    # Save file (streamed to disk in chunks) under a per-upload name, so uploads
+    # sharing a filename never overwrite each other or each other's normalized audio
+    file_path = os.path.join(UPLOAD_DIR, f"{current_user.id}_{uuid.uuid4().hex}{file_ext}")
+    saved = await save_upload_file(file, file_path, settings.MAX_VOICE_UPLOAD_MB * 1024 * 1024)
     
     # Parse tags
     tags_list = json.loads(tags) if tags else []
     
-    # Process voice note
-    voice_note = await VoiceNoteService.process_voice_note(
-        db, current_user.id, file_path, file.filename, subject, tags_list
+    # Queue transcription and summarization for the background workers
+    # (re-uploads of already processed audio complete straight from the cache)
+    voice_note, job = VoiceNoteService.create_voice_note(
+        db, current_user.id, file_path, file.filename, subject, tags_list, saved.sha256
     )
     
     response_data = serialize_voice_note(voice_note)
+    response_data["job_id"] = job.id if job else None
     
     # Return response with explicit CORS headers
     return JSONResponse(
+        status_code=202 if job else 200,
         content=response_data,
         headers={
             "Access-Control-Allow-Origin": "*",
@@ -128,26 +135,70 @@ async def upload_voice_note(
 def get_voice_notes(
     subject: Optional[str] = None,
     query: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
     db: Session = Depends(get_db)
 ):
-    """Get user's voice note library with optional filtering (no auth required for demo)"""
+    """Get user's voice note library with optional filtering (no auth required for demo)
+    
+    Pages are newest first and omit transcriptions (fetch a note by id for the full text).
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
     from fastapi.responses import JSONResponse
     
     # Use demo user
     current_user = get_demo_user(db)
+    limit = min(max(limit, 1), 200)
+    next_cursor = None
+    
+    if query:
+        # Ranked full-text matches, best first, with highlighted snippets
+        result = []
+        for note, rank, snippet in VoiceNoteService.full_text_search(db, current_user.id, query, subject, limit):
+            item = serialize_voice_note(note)
+            item["rank"] = rank
+            item["snippet"] = snippet
+            result.append(item)
+    else:
+        notes, next_cursor = VoiceNoteService.list_voice_notes(db, current_user.id, subject, cursor, limit)
+        result = [serialize_voice_note(note) for note in notes]
+    
+    headers = {
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "GET, OPTIONS",
+        "Access-Control-Allow-Headers": "*",
+        "Access-Control-Expose-Headers": "X-Next-Cursor",
+    }
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
     
-    notes = VoiceNoteService.search_voice_notes(db, current_user.id, query, subject)
-    
-    result = [serialize_voice_note(note) for note in notes]
+    return JSONResponse(content=result, headers=headers)
+
+
+@router.get("/search/semantic")
+def semantic_search_voice_notes(
+    q: str,
+    limit: int = 10,
+    subject: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Find transcript passages by meaning rather than exact words (no auth required for demo)"""
+    # Use demo user
+    current_user = get_demo_user(db)
     
-    return JSONResponse(
-        content=result,
-        headers={
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "GET, OPTIONS",
-            "Access-Control-Allow-Headers": "*",
-        }
-    )
+    return VoiceSearchService.semantic_search(db, current_user.id, q, min(max(limit, 1), 50), subject)
+
+
+@router.get("/jobs/{job_id}")
+def get_voice_job_status(
+    job_id: int,
+    db: Session = Depends(get_db)
+):
+    """Get the processing status of an uploaded voice note (no auth required for demo)"""
+    job_status = VoiceJobService.get_status(db, job_id)
+    if not job_status:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_status
 
 
 @router.get("/{note_id}", response_model=VoiceNoteResponse)
@@ -174,3 +225,31 @@ def get_voice_note(
         "key_points": json.loads(note.key_points) if note.key_points else [],
         "tags": json.loads(note.tags) if note.tags else []
     }
+
+
+@router.post("/{note_id}/ask")
+def ask_about_voice_note(
+    note_id: int,
+    body: VoiceNoteQuestion,
+    db: Session = Depends(get_db)
+):
+    """Ask a follow-up question about a processed voice note (no auth required for demo)"""
+    from ..models.voice_note import VoiceNote
+    
+    # Use demo user
+    current_user = get_demo_user(db)
+    
+    note = db.query(VoiceNote).filter(
+        VoiceNote.id == note_id,
+        VoiceNote.user_id == current_user.id
+    ).first()
+    
+    if not note:
+        raise HTTPException(status_code=404, detail="Voice note not found")
+    if note.status != "completed":
+        raise HTTPException(status_code=409, detail="Voice note is still being processed")
+    
+    return {
+        "question": body.question,
+        "answer": VoiceNoteService.answer_question(db, note, body.question)
+    }
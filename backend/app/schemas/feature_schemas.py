@@ -16,6 +16,7 @@ class VoiceNoteResponse(BaseModel):
     transcription: Optional[str]
     summary: Optional[str]
     key_points: Optional[List[str]]
+    status: Optional[str]
     subject: Optional[str]
     tags: Optional[List[str]]
     created_at: datetime
@@ -25,6 +26,10 @@ class VoiceNoteResponse(BaseModel):
         orm_mode = True
 
 
+class VoiceNoteQuestion(BaseModel):
+    question: str
+
+
 class StudySessionCreate(BaseModel):
     room_type: str
     focus_timer_duration: Optional[int] = 25
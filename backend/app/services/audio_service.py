@@ -0,0 +1,61 @@
+import os
+import subprocess
+from typing import NamedTuple, Optional
+from ..config import settings
+from .transcription_service import TranscriptionService
+
+
+class NormalizedAudio(NamedTuple):
+    path: str
+    original_size: int  # bytes as uploaded
+    size: int  # bytes as stored
+    duration: Optional[float]  # seconds
+
+
+class AudioService:
+    @staticmethod
+    def normalized_path(file_path: str) -> str:
+        return f"{os.path.splitext(file_path)[0]}.16k.ogg"
+    
+    @staticmethod
+    def original(file_path: str) -> NormalizedAudio:
+        """Describe an upload that is kept as-is (sizes and, with ffprobe, duration)"""
+        size = os.path.getsize(file_path)
+        return NormalizedAudio(file_path, size, size, TranscriptionService.probe_duration(file_path))
+    
+    @staticmethod
+    def normalize(file_path: str) -> NormalizedAudio:
+        """Re-encode an upload as 16 kHz mono Opus, replacing the original if that saves space.
+        
+        Without ffmpeg, or if conversion fails, the original file is kept as-is.
+        """
+        original_size = os.path.getsize(file_path)
+        if not settings.AUDIO_NORMALIZE or not TranscriptionService.ffmpeg_available():
+            return NormalizedAudio(file_path, original_size, original_size, None)
+        
+        output_path = AudioService.normalized_path(file_path)
+        part_path = f"{output_path}.part"
+        try:
+            subprocess.run(
+                ["ffmpeg", "-v", "error", "-y", "-i", file_path, "-vn",
+                 "-ac", "1", "-ar", str(settings.AUDIO_SAMPLE_RATE),
+                 "-c:a", "libopus", "-b:a", settings.AUDIO_BITRATE, "-application", "voip",
+                 "-f", "ogg", part_path],
+                check=True, capture_output=True
+            )
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"Audio normalization error: {e}")
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            return AudioService.original(file_path)
+        
+        size = os.path.getsize(part_path)
+        if size >= original_size:
+            # Already compact (e.g. a low-bitrate upload); keep the original
+            os.remove(part_path)
+            return AudioService.original(file_path)
+        
+        os.replace(part_path, output_path)
+        if os.path.abspath(output_path) != os.path.abspath(file_path):
+            os.remove(file_path)
+        return NormalizedAudio(output_path, original_size, size, TranscriptionService.probe_duration(output_path))
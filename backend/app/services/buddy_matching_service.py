@@ -1,40 +1,285 @@
+import os
 import json
-from typing import List, Dict
+import time
+import asyncio
+import hashlib
+import threading
+from datetime import timedelta
+from typing import List, Dict, Optional, Set, Tuple
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
-from groq import Groq
+from groq import AsyncGroq
 from ..models.user import User
 from ..models.buddy_match import BuddyMatch
+from ..models.buddy_candidate import BuddyCandidate
+from ..models.user_embedding import UserEmbedding
 from ..config import settings
+from .embedding_service import EmbeddingService, EMBEDDING_MODEL_NAME
+from .vector_index import VectorIndex, create_index, load_index
+from .explanation_cache_service import ExplanationCacheService
+from ..utils.async_utils import run_async
+from ..utils.upsert import upsert
 
-# Initialize models
-embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-groq_client = Groq(api_key=settings.GROQ_API_KEY) if settings.GROQ_API_KEY else None
+# Process-wide ANN index over stored profile embeddings
+_index: Optional[VectorIndex] = None
+_index_lock = threading.Lock()
+_index_synced_at = None  # Newest user_embeddings timestamp applied to the index
+_index_checked_at = 0.0  # time.monotonic() of the last incremental sync
 
 
 class BuddyMatchingService:
     @staticmethod
-    def create_user_profile_embedding(user: User) -> np.ndarray:
-        """Create embedding from user's study profile"""
+    def build_profile_text(user: User) -> str:
+        """Build the text representation of a user's study profile"""
         subjects = json.loads(user.subjects) if user.subjects else []
         strengths = json.loads(user.strengths) if user.strengths else []
         weaknesses = json.loads(user.weaknesses) if user.weaknesses else []
         patterns = json.loads(user.study_patterns) if user.study_patterns else []
         
-        # Create text representation
-        profile_text = f"""
+        return f"""
         Subjects: {', '.join(subjects)}
         Strengths: {', '.join(strengths)}
         Weaknesses: {', '.join(weaknesses)}
         Study patterns: {', '.join(patterns)}
         """
+    
+    @staticmethod
+    def profile_hash(user: User) -> str:
+        """Hash identifying the profile version an embedding was built from"""
+        profile_text = BuddyMatchingService.build_profile_text(user)
+        return hashlib.sha256(f"{EMBEDDING_MODEL_NAME}\n{profile_text}".encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def create_user_profile_embedding(user: User) -> np.ndarray:
+        """Create embedding from user's study profile"""
+        profile_text = BuddyMatchingService.build_profile_text(user)
         
         # Generate embedding
-        embedding = embedding_model.encode(profile_text)
+        embedding = EmbeddingService.encode(profile_text)
         return embedding
     
+    @staticmethod
+    def save_user_embedding(db: Session, user: User, embedding: np.ndarray, profile_hash: str = None) -> UserEmbedding:
+        """Insert or update the stored embedding for a user (caller commits)"""
+        vector = np.asarray(embedding, dtype=np.float32)
+        stored = db.query(UserEmbedding).filter(UserEmbedding.user_id == user.id).first()
+        if not stored:
+            stored = UserEmbedding(user_id=user.id)
+            db.add(stored)
+        
+        stored.profile_hash = profile_hash or BuddyMatchingService.profile_hash(user)
+        stored.embedding = vector.tobytes()
+        stored.dimension = int(vector.shape[0])
+        
+        # Keep the in-memory index in step with the table
+        if _index is not None:
+            _index.upsert(user.id, vector, stored.profile_hash)
+        return stored
+    
+    @staticmethod
+    def refresh_user_embedding(db: Session, user: User) -> np.ndarray:
+        """Recompute a user's stored embedding if their profile changed (caller commits)"""
+        profile_hash = BuddyMatchingService.profile_hash(user)
+        stored = db.query(UserEmbedding).filter(UserEmbedding.user_id == user.id).first()
+        if stored and stored.profile_hash == profile_hash:
+            return np.frombuffer(stored.embedding, dtype=np.float32)
+        
+        embedding = BuddyMatchingService.create_user_profile_embedding(user)
+        BuddyMatchingService.save_user_embedding(db, user, embedding, profile_hash)
+        return np.asarray(embedding, dtype=np.float32)
+    
+    @staticmethod
+    def load_user_embeddings(db: Session, users: List[User]) -> Dict[int, np.ndarray]:
+        """Load stored embeddings for users, encoding only missing or stale profiles (caller commits)"""
+        user_ids = [user.id for user in users]
+        stored = {
+            row.user_id: row
+            for row in db.query(UserEmbedding).filter(UserEmbedding.user_id.in_(user_ids)).all()
+        } if user_ids else {}
+        
+        embeddings = {}
+        stale_users = []
+        for user in users:
+            row = stored.get(user.id)
+            if row and row.profile_hash == BuddyMatchingService.profile_hash(user):
+                embeddings[user.id] = np.frombuffer(row.embedding, dtype=np.float32)
+            else:
+                stale_users.append(user)
+        
+        # Encode the rest in one batch and upsert them, so workers backfilling the same users don't collide
+        if stale_users:
+            vectors = np.asarray(EmbeddingService.encode(
+                [BuddyMatchingService.build_profile_text(user) for user in stale_users]
+            ), dtype=np.float32)
+            rows = []
+            for user, vector in zip(stale_users, vectors):
+                rows.append({
+                    "user_id": user.id,
+                    "profile_hash": BuddyMatchingService.profile_hash(user),
+                    "embedding": vector.tobytes(),
+                    "dimension": int(vector.shape[0])
+                })
+                embeddings[user.id] = vector
+            upsert(db, UserEmbedding, rows, ["user_id"], {"updated_at": func.now()})
+            if _index is not None:
+                _index.upsert_many([row["user_id"] for row in rows], vectors, [row["profile_hash"] for row in rows])
+        
+        return embeddings
+    
+    @staticmethod
+    def backfill_embeddings(db: Session, batch_size: int = 256) -> int:
+        """Embed profiles that have no stored embedding yet, e.g. seeded users or ones
+        created before embeddings were stored (caller commits)"""
+        backfilled = 0
+        while True:
+            users = db.query(User).outerjoin(UserEmbedding, UserEmbedding.user_id == User.id).filter(
+                User.subjects.isnot(None),
+                UserEmbedding.user_id.is_(None)
+            ).order_by(User.id).limit(batch_size).all()
+            if not users:
+                return backfilled
+            BuddyMatchingService.load_user_embeddings(db, users)
+            backfilled += len(users)
+    
+    @staticmethod
+    def get_index(db: Session) -> VectorIndex:
+        """Return the buddy index, loading it on first use and applying recent profile changes"""
+        global _index_checked_at
+        if _index is not None and time.monotonic() - _index_checked_at < settings.BUDDY_INDEX_SYNC_SECONDS:
+            return _index
+        
+        # Embed profiles nobody has matched from yet here rather than at startup,
+        # so booting a worker never loads the embedding model
+        try:
+            BuddyMatchingService.backfill_embeddings(db)
+        except Exception as e:
+            print(f"Error backfilling profile embeddings: {e}")
+        
+        if _index is None:
+            return BuddyMatchingService.load_index(db)
+        # Pick up profiles re-embedded by other workers
+        BuddyMatchingService.sync_index(db)
+        _index_checked_at = time.monotonic()
+        return _index
+    
+    @staticmethod
+    def load_index(db: Session) -> VectorIndex:
+        """Load the persisted index (or build a new one) and reconcile it with the database.
+        
+        Only stored embeddings are used, so this never loads the embedding model:
+        profiles without one are backfilled by get_index or reembed_profiles.py.
+        """
+        global _index, _index_synced_at
+        with _index_lock:
+            if _index is not None:
+                return _index
+            
+            index = None
+            if os.path.exists(settings.BUDDY_INDEX_PATH):
+                try:
+                    index = load_index(settings.BUDDY_INDEX_PATH, nprobe=settings.BUDDY_INDEX_NPROBE)
+                except Exception as e:
+                    print(f"Error loading buddy index, rebuilding: {e}")
+            if index is None:
+                dimension = db.query(UserEmbedding.dimension).limit(1).scalar()
+                if dimension is None:
+                    # Nothing embedded yet; build the index once the first embedding is stored
+                    return create_index("brute", 0)
+                index = create_index(
+                    settings.BUDDY_INDEX_BACKEND, dimension,
+                    nprobe=settings.BUDDY_INDEX_NPROBE, dtype=settings.BUDDY_EMBEDDING_DTYPE
+                )
+            
+            # Reconcile versions: upsert changed vectors, drop deleted users
+            versions = dict(db.query(UserEmbedding.user_id, UserEmbedding.profile_hash).all())
+            stale_ids = [user_id for user_id, version in versions.items() if index.versions.get(user_id) != version]
+            for user_id in [user_id for user_id in index.versions if user_id not in versions]:
+                index.remove(user_id)
+            for start in range(0, len(stale_ids), 1024):
+                BuddyMatchingService._upsert_rows(index, db.query(UserEmbedding).filter(
+                    UserEmbedding.user_id.in_(stale_ids[start:start + 1024])
+                ).all())
+            
+            _index_synced_at = db.query(
+                func.max(func.coalesce(UserEmbedding.updated_at, UserEmbedding.created_at))
+            ).scalar()
+            _index = index
+        
+        if index.dirty:
+            BuddyMatchingService.save_index()
+        return index
+    
+    @staticmethod
+    def sync_index(db: Session):
+        """Apply embeddings written since the last sync to the in-memory index"""
+        global _index_synced_at
+        if _index is None:
+            return
+        changed_at = func.coalesce(UserEmbedding.updated_at, UserEmbedding.created_at)
+        query = db.query(UserEmbedding)
+        if _index_synced_at is not None:
+            # Look back a full sync interval: SQLite's CURRENT_TIMESTAMP text has no
+            # fractional seconds (so rows from the same second sort below the bound) and
+            # PostgreSQL's now() is the transaction start, so rows can commit "in the past".
+            # Rows seen twice are skipped by the version check below.
+            lookback = timedelta(seconds=max(settings.BUDDY_INDEX_SYNC_SECONDS, 1))
+            query = query.filter(changed_at >= _index_synced_at - lookback)
+        rows = query.all()
+        BuddyMatchingService._upsert_rows(_index, [
+            row for row in rows if _index.versions.get(row.user_id) != row.profile_hash
+        ])
+        timestamps = [row.updated_at or row.created_at for row in rows if row.updated_at or row.created_at]
+        if timestamps and (_index_synced_at is None or max(timestamps) > _index_synced_at):
+            _index_synced_at = max(timestamps)
+    
+    @staticmethod
+    def _upsert_rows(index: VectorIndex, rows: List[UserEmbedding]):
+        if rows:
+            index.upsert_many(
+                [row.user_id for row in rows],
+                np.vstack([np.frombuffer(row.embedding, dtype=np.float32) for row in rows]),
+                [row.profile_hash for row in rows]
+            )
+    
+    @staticmethod
+    def save_index():
+        """Persist the in-memory index to disk if it changed"""
+        if _index is None or not _index.dirty:
+            return
+        try:
+            _index.save(settings.BUDDY_INDEX_PATH)
+        except Exception as e:
+            print(f"Error saving buddy index: {e}")
+    
+    @staticmethod
+    def get_matched_user_ids(db: Session, user_id: int) -> Set[int]:
+        """Ids of every user already matched with this user, in either direction"""
+        rows = db.query(BuddyMatch.matched_user_id).filter(
+            BuddyMatch.user_id == user_id
+        ).union(
+            db.query(BuddyMatch.user_id).filter(BuddyMatch.matched_user_id == user_id)
+        ).all()
+        return {row[0] for row in rows}
+    
+    @staticmethod
+    def get_precomputed_candidates(db: Session, user: User) -> Optional[Tuple[List[int], List[float], bool]]:
+        """Precomputed (candidate ids, scores, complete) for a user, or None if absent or stale
+        
+        complete is True when the job found fewer candidates than the top_k it
+        ran with, i.e. the list holds every candidate the user has.
+        """
+        rows = db.query(
+            BuddyCandidate.candidate_user_id, BuddyCandidate.score, BuddyCandidate.profile_hash, BuddyCandidate.top_k
+        ).filter(
+            BuddyCandidate.user_id == user.id
+        ).order_by(BuddyCandidate.rank).all()
+        if not rows or rows[0].profile_hash != BuddyMatchingService.profile_hash(user):
+            return None
+        # Rows written before top_k was stored were computed with the configured value
+        top_k = rows[0].top_k or settings.BUDDY_PRECOMPUTE_TOP_K
+        return [row.candidate_user_id for row in rows], [row.score for row in rows], len(rows) < top_k
+    
     @staticmethod
     def find_compatible_matches(db: Session, user_id: int, limit: int = 5) -> List[BuddyMatch]:
         """Find compatible study buddies for a user"""
@@ -43,66 +288,96 @@ class BuddyMatchingService:
         if not current_user:
             return []
         
-        # Get all other users with profiles
-        other_users = db.query(User).filter(
-            User.id != user_id,
-            User.subjects.isnot(None)
-        ).all()
+        # Users already matched in either direction are excluded
+        matched_ids = BuddyMatchingService.get_matched_user_ids(db, user_id)
         
-        if not other_users:
-            return []
+        # Prefer the background job's precomputed list; search live if it is
+        # missing, stale, or truncated and used up by existing matches
+        precomputed = BuddyMatchingService.get_precomputed_candidates(db, current_user)
+        if precomputed is not None:
+            candidate_ids, candidate_scores, complete = precomputed
+            viable = sum(1 for candidate_id in candidate_ids if candidate_id not in matched_ids)
+            if viable < limit and not complete:
+                precomputed = None
+        
+        if precomputed is None:
+            # Make sure the current user's own vector is up to date (flushed, so
+            # building the index sees it: the session doesn't autoflush)
+            current_embedding = BuddyMatchingService.refresh_user_embedding(db, current_user)
+            db.flush()
+            index = BuddyMatchingService.get_index(db)
+            
+            # Query the index for a candidate pool (the threshold and filters apply after)
+            candidate_ids, candidate_scores = index.search(
+                current_embedding, limit + len(matched_ids) + settings.BUDDY_CANDIDATE_POOL + 1
+            )
+            candidate_ids = [int(candidate_id) for candidate_id in candidate_ids]
         
-        # Create embeddings
-        current_embedding = BuddyMatchingService.create_user_profile_embedding(current_user)
+        candidates = {
+            user.id: user
+            for user in db.query(User).filter(
+                User.id.in_(candidate_ids),
+                User.id != user_id,
+                User.subjects.isnot(None)
+            ).all()
+        } if candidate_ids else {}
         
-        matches = []
-        for other_user in other_users:
-            # Check if match already exists
-            existing_match = db.query(BuddyMatch).filter(
-                ((BuddyMatch.user_id == user_id) & (BuddyMatch.matched_user_id == other_user.id)) |
-                ((BuddyMatch.user_id == other_user.id) & (BuddyMatch.matched_user_id == user_id))
-            ).first()
+        current_subjects = set(json.loads(current_user.subjects) if current_user.subjects else [])
+        current_weaknesses = set(json.loads(current_user.weaknesses) if current_user.weaknesses else [])
+        
+        top_matches = []
+        explanation_requests = []
+        for candidate_id, similarity in zip(candidate_ids, candidate_scores):
+            if similarity <= 0.3 or len(top_matches) >= limit:  # Threshold for compatibility
+                break
             
-            if existing_match:
+            other_user = candidates.get(candidate_id)
+            if not other_user or candidate_id in matched_ids:
                 continue
             
-            other_embedding = BuddyMatchingService.create_user_profile_embedding(other_user)
-            
-            # Calculate similarity
-            similarity = cosine_similarity(
-                current_embedding.reshape(1, -1),
-                other_embedding.reshape(1, -1)
-            )[0][0]
-            
             # Find shared subjects and complementary areas
-            current_subjects = set(json.loads(current_user.subjects) if current_user.subjects else [])
             other_subjects = set(json.loads(other_user.subjects) if other_user.subjects else [])
             shared_subjects = list(current_subjects & other_subjects)
             
-            current_weaknesses = set(json.loads(current_user.weaknesses) if current_user.weaknesses else [])
             other_strengths = set(json.loads(other_user.strengths) if other_user.strengths else [])
             complementary = list(current_weaknesses & other_strengths)
             
-            if similarity > 0.3:  # Threshold for compatibility
-                # Generate explanation using GPT
-                explanation = BuddyMatchingService.generate_match_explanation(
-                    current_user, other_user, similarity, shared_subjects, complementary
-                )
-                
-                match = BuddyMatch(
-                    user_id=user_id,
-                    matched_user_id=other_user.id,
-                    compatibility_score=float(similarity),
-                    match_explanation=explanation,
-                    shared_subjects=json.dumps(shared_subjects),
-                    complementary_areas=json.dumps(complementary),
-                    status="pending"
-                )
-                matches.append((similarity, match))
+            top_matches.append(BuddyMatch(
+                user_id=user_id,
+                matched_user_id=other_user.id,
+                compatibility_score=float(similarity),
+                shared_subjects=json.dumps(shared_subjects),
+                complementary_areas=json.dumps(complementary),
+                status="pending"
+            ))
+            explanation_requests.append((other_user, similarity, shared_subjects, complementary))
+            matched_ids.add(candidate_id)
         
-        # Sort by similarity and take top matches
-        matches.sort(key=lambda x: x[0], reverse=True)
-        top_matches = [match for _, match in matches[:limit]]
+        # Serve cached explanations, then generate the rest concurrently
+        current_profile = BuddyMatchingService.explanation_profile(current_user)
+        cache_keys = [
+            ExplanationCacheService.make_key(
+                current_profile, BuddyMatchingService.explanation_profile(other_user),
+                shared_subjects, complementary, similarity
+            )
+            for other_user, similarity, shared_subjects, complementary in explanation_requests
+        ]
+        cached = ExplanationCacheService.get_many(db, cache_keys)
+        misses = [i for i, key in enumerate(cache_keys) if key not in cached]
+        generated = run_async(BuddyMatchingService.generate_match_explanations(
+            current_user, [explanation_requests[i] for i in misses]
+        ))
+        
+        new_entries = {}
+        for i, explanation in zip(misses, generated):
+            if explanation:
+                new_entries[cache_keys[i]] = explanation
+        ExplanationCacheService.put_many(db, new_entries)
+        
+        for match, key, request in zip(top_matches, cache_keys, explanation_requests):
+            match.match_explanation = (
+                cached.get(key) or new_entries.get(key) or BuddyMatchingService.fallback_explanation(request[2])
+            )
         
         # Save to database
         for match in top_matches:
@@ -112,15 +387,47 @@ class BuddyMatchingService:
         return top_matches
     
     @staticmethod
-    def generate_match_explanation(
-        user1: User, user2: User, score: float, 
+    def explanation_profile(user: User) -> Dict[str, List[str]]:
+        """Profile fields that go into the explanation prompt"""
+        return {
+            "subjects": json.loads(user.subjects) if user.subjects else [],
+            "strengths": json.loads(user.strengths) if user.strengths else [],
+            "weaknesses": json.loads(user.weaknesses) if user.weaknesses else []
+        }
+    
+    @staticmethod
+    def fallback_explanation(shared_subjects: List[str]) -> str:
+        """Template explanation used when the LLM is unavailable or too slow"""
+        return f"You both study {', '.join(shared_subjects[:2]) if shared_subjects else 'similar subjects'} and have complementary strengths that could help each other succeed!"
+    
+    @staticmethod
+    async def generate_match_explanations(
+        user: User, requests: List[Tuple[User, float, List[str], List[str]]]
+    ) -> List[Optional[str]]:
+        """Generate explanations for (other_user, score, shared_subjects, complementary) requests
+        concurrently; entries are None where the LLM was unavailable, failed or timed out"""
+        if not requests:
+            return []
+        if not settings.GROQ_API_KEY:
+            return [None] * len(requests)
+        
+        semaphore = asyncio.Semaphore(settings.BUDDY_EXPLANATION_CONCURRENCY)
+        async with AsyncGroq(api_key=settings.GROQ_API_KEY, max_retries=0) as client:
+            async def bounded(other_user, score, shared_subjects, complementary):
+                async with semaphore:
+                    return await BuddyMatchingService.generate_match_explanation(
+                        client, user, other_user, score, shared_subjects, complementary
+                    )
+            
+            return await asyncio.gather(*(bounded(*request) for request in requests))
+    
+    @staticmethod
+    async def generate_match_explanation(
+        client: AsyncGroq, user1: User, user2: User, score: float, 
         shared_subjects: List[str], complementary: List[str]
-    ) -> str:
-        """Generate AI explanation for why users are matched"""
+    ) -> Optional[str]:
+        """Generate AI explanation for why users are matched (None on failure)"""
         try:
-            if not groq_client:
-                return f"You both study {', '.join(shared_subjects[:2]) if shared_subjects else 'similar subjects'} and have complementary strengths that could help each other succeed!"
-            
             prompt = f"""Generate a friendly, concise explanation (2-3 sentences) for why these two students would make good study buddies:
 
 Student 1: Studies {json.loads(user1.subjects) if user1.subjects else []}, 
@@ -133,20 +440,26 @@ needs help with {json.loads(user2.weaknesses) if user2.weaknesses else []}
 
 Shared subjects: {shared_subjects}
 Complementary strengths: {complementary}
-Compatibility score: {score:.2f}
+Compatibility score: {ExplanationCacheService.bucket_score(score):.2f}
 """
             
-            response = groq_client.chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=[
-                    {"role": "system", "content": "You are a helpful study buddy matching assistant."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=150,
-                temperature=0.7
+            response = await asyncio.wait_for(
+                client.chat.completions.create(
+                    model="llama-3.1-8b-instant",
+                    messages=[
+                        {"role": "system", "content": "You are a helpful study buddy matching assistant."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=150,
+                    temperature=0.7
+                ),
+                timeout=settings.BUDDY_EXPLANATION_TIMEOUT
             )
             
             return response.choices[0].message.content.strip()
+        except asyncio.TimeoutError:
+            print(f"Explanation timed out after {settings.BUDDY_EXPLANATION_TIMEOUT}s, using template")
+            return None
         except Exception as e:
             print(f"Error generating explanation: {e}")
-            return f"You both study {', '.join(shared_subjects[:2]) if shared_subjects else 'similar subjects'} and have complementary strengths that could help each other succeed!"
+            return None
@@ -0,0 +1,164 @@
+import os
+import time
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from ..database import SessionLocal
+from ..models.buddy_candidate import BuddyCandidate
+from ..models.user_embedding import UserEmbedding
+from ..config import settings
+from .buddy_matching_service import BuddyMatchingService
+
+try:
+    import fcntl
+except ImportError:  # Windows: every worker with the scheduler enabled runs it
+    fcntl = None
+
+
+class BuddyRecommendationService:
+    """Batch job that precomputes top-k buddy candidates for every user"""
+    
+    # Metrics from the most recent run, for monitoring
+    last_run: Dict = {}
+    
+    _stop_event = threading.Event()
+    _thread: Optional[threading.Thread] = None
+    
+    @staticmethod
+    def recompute_all(db: Session, top_k: int = None, batch_size: int = 500, verbose: bool = True) -> Dict:
+        """Recompute the buddy_candidates table in batches of users"""
+        top_k = top_k or settings.BUDDY_PRECOMPUTE_TOP_K
+        started = time.perf_counter()
+        
+        index = BuddyMatchingService.get_index(db)
+        total = db.query(func.count(UserEmbedding.user_id)).scalar() or 0
+        processed = written = batches = 0
+        search_seconds = write_seconds = 0.0
+        last_user_id = 0
+        
+        while True:
+            # Keyset pagination keeps each batch query cheap
+            rows = db.query(UserEmbedding).filter(
+                UserEmbedding.user_id > last_user_id
+            ).order_by(UserEmbedding.user_id).limit(batch_size).all()
+            if not rows:
+                break
+            last_user_id = rows[-1].user_id
+            
+            search_started = time.perf_counter()
+            mappings = []
+            for row in rows:
+                candidate_ids, scores = index.search(np.frombuffer(row.embedding, dtype=np.float32), top_k + 1)
+                rank = 0
+                for candidate_id, score in zip(candidate_ids, scores):
+                    if candidate_id == row.user_id:
+                        continue
+                    if rank >= top_k:
+                        break
+                    mappings.append({
+                        "user_id": row.user_id,
+                        "candidate_user_id": int(candidate_id),
+                        "score": float(score),
+                        "rank": rank,
+                        "top_k": top_k,
+                        "profile_hash": row.profile_hash
+                    })
+                    rank += 1
+            search_seconds += time.perf_counter() - search_started
+            
+            # Replace the batch's lists in one transaction
+            write_started = time.perf_counter()
+            try:
+                db.query(BuddyCandidate).filter(
+                    BuddyCandidate.user_id.in_([row.user_id for row in rows])
+                ).delete(synchronize_session=False)
+                db.bulk_insert_mappings(BuddyCandidate, mappings)
+                db.commit()
+            except IntegrityError:
+                # Another run (e.g. a manual precompute) rewrote these lists concurrently; keep its rows
+                db.rollback()
+                print(f"Buddy candidates for users up to {last_user_id} changed concurrently, skipped")
+            db.expunge_all()
+            write_seconds += time.perf_counter() - write_started
+            
+            processed += len(rows)
+            written += len(mappings)
+            batches += 1
+            if verbose:
+                elapsed = time.perf_counter() - started
+                print(f"  {processed}/{total} users, {written} candidates ({processed / elapsed:.0f} users/s)")
+        
+        elapsed = time.perf_counter() - started
+        metrics = {
+            "users": processed,
+            "candidates": written,
+            "batches": batches,
+            "top_k": top_k,
+            "seconds": round(elapsed, 3),
+            "search_seconds": round(search_seconds, 3),
+            "write_seconds": round(write_seconds, 3),
+            "users_per_second": round(processed / elapsed, 1) if elapsed else 0.0,
+            "finished_at": datetime.utcnow().isoformat()
+        }
+        BuddyRecommendationService.last_run = metrics
+        return metrics
+    
+    @staticmethod
+    def _acquire_scheduler_lock():
+        """Open file holding the scheduler lock, or None if another process has it"""
+        if fcntl is None:
+            return True
+        directory = os.path.dirname(settings.BUDDY_PRECOMPUTE_LOCK_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        lock_file = open(settings.BUDDY_PRECOMPUTE_LOCK_PATH, "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return None
+        return lock_file
+    
+    @staticmethod
+    def start_scheduler(interval_minutes: int):
+        """Recompute candidates every `interval_minutes` on a daemon thread.
+        
+        Every uvicorn worker starts the thread, but only the one holding the
+        scheduler lock runs the job; the others keep trying to take it over
+        in case that worker exits (the OS releases the lock with the process).
+        """
+        if BuddyRecommendationService._thread is not None:
+            return
+        
+        def run():
+            stop_event = BuddyRecommendationService._stop_event
+            lock = None
+            while not stop_event.wait(interval_minutes * 60):
+                if lock is None:
+                    lock = BuddyRecommendationService._acquire_scheduler_lock()
+                    if lock is None:
+                        continue
+                db = SessionLocal()
+                try:
+                    metrics = BuddyRecommendationService.recompute_all(db, verbose=False)
+                    print(f"✅ Buddy candidates recomputed: {metrics['users']} users in {metrics['seconds']}s")
+                except Exception as e:
+                    print(f"Buddy candidate precompute error: {e}")
+                finally:
+                    db.close()
+            if lock not in (None, True):
+                lock.close()
+        
+        BuddyRecommendationService._stop_event.clear()
+        BuddyRecommendationService._thread = threading.Thread(target=run, name="buddy-precompute", daemon=True)
+        BuddyRecommendationService._thread.start()
+    
+    @staticmethod
+    def stop_scheduler():
+        """Stop the scheduler thread (a run in progress finishes its batch loop first)"""
+        BuddyRecommendationService._stop_event.set()
+        BuddyRecommendationService._thread = None
@@ -0,0 +1,110 @@
+import threading
+from collections import Counter
+from typing import Dict, Optional
+from sqlalchemy import bindparam, func, update
+from ..config import settings
+from ..database import SessionLocal
+from ..models.resource import Resource
+from ..models.resource_unit import ResourceUnit
+
+
+class DownloadCounterService:
+    """In-process buffer for download counts, flushed in batched UPDATEs.
+    
+    Downloads only bump counters in memory; a background thread adds them to
+    resource_units.download_count and resources.total_downloads every few
+    seconds (or sooner once enough pile up). The UPDATEs are relative
+    (x = x + n), so several app processes can each keep their own buffer.
+    """
+    
+    _lock = threading.Lock()
+    _units: Counter = Counter()  # resource_unit_id -> pending downloads
+    _resources: Counter = Counter()  # resource_id -> pending downloads
+    _pending = 0
+    
+    _stop_event = threading.Event()
+    _wake_event = threading.Event()
+    _thread: Optional[threading.Thread] = None
+    
+    @staticmethod
+    def record(resource_unit_id: int, resource_id: int, count: int = 1):
+        """Count a download of a unit (and its resource)"""
+        with DownloadCounterService._lock:
+            DownloadCounterService._units[resource_unit_id] += count
+            DownloadCounterService._resources[resource_id] += count
+            DownloadCounterService._pending += count
+            due = DownloadCounterService._pending >= settings.DOWNLOAD_FLUSH_THRESHOLD
+        
+        if DownloadCounterService._thread is None:
+            # No flusher running (scripts, or buffering disabled): write through
+            DownloadCounterService.flush()
+        elif due:
+            DownloadCounterService._wake_event.set()
+    
+    @staticmethod
+    def flush() -> Dict[str, int]:
+        """Write buffered counts to the database; on failure they stay buffered for the next flush"""
+        with DownloadCounterService._lock:
+            units, resources = DownloadCounterService._units, DownloadCounterService._resources
+            if not units and not resources:
+                return {"units": 0, "resources": 0}
+            DownloadCounterService._units = Counter()
+            DownloadCounterService._resources = Counter()
+            DownloadCounterService._pending = 0
+        
+        db = SessionLocal()
+        try:
+            # One executemany per table: UPDATE ... SET x = coalesce(x, 0) + :n WHERE id = :id
+            unit_table = ResourceUnit.__table__
+            db.execute(
+                update(unit_table)
+                .where(unit_table.c.id == bindparam("row_id"))
+                .values(download_count=func.coalesce(unit_table.c.download_count, 0) + bindparam("n")),
+                [{"row_id": row_id, "n": n} for row_id, n in units.items()]
+            )
+            resource_table = Resource.__table__
+            db.execute(
+                update(resource_table)
+                .where(resource_table.c.id == bindparam("row_id"))
+                .values(total_downloads=func.coalesce(resource_table.c.total_downloads, 0) + bindparam("n")),
+                [{"row_id": row_id, "n": n} for row_id, n in resources.items()]
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Download counter flush error: {e}")
+            with DownloadCounterService._lock:
+                DownloadCounterService._units.update(units)
+                DownloadCounterService._resources.update(resources)
+                DownloadCounterService._pending += sum(units.values())
+            return {"units": 0, "resources": 0}
+        finally:
+            db.close()
+        return {"units": len(units), "resources": len(resources)}
+    
+    @staticmethod
+    def start_flusher(interval_seconds: float):
+        """Flush buffered counts every `interval_seconds` on a daemon thread"""
+        if DownloadCounterService._thread is not None:
+            return
+        
+        def run():
+            while not DownloadCounterService._stop_event.is_set():
+                DownloadCounterService._wake_event.wait(interval_seconds)
+                DownloadCounterService._wake_event.clear()
+                DownloadCounterService.flush()
+        
+        DownloadCounterService._stop_event.clear()
+        DownloadCounterService._thread = threading.Thread(target=run, name="download-counter-flush", daemon=True)
+        DownloadCounterService._thread.start()
+    
+    @staticmethod
+    def stop_flusher():
+        """Stop the flusher thread and write out whatever is still buffered"""
+        thread = DownloadCounterService._thread
+        DownloadCounterService._stop_event.set()
+        DownloadCounterService._wake_event.set()
+        if thread is not None:
+            thread.join(timeout=10)
+        DownloadCounterService._thread = None
+        DownloadCounterService.flush()
@@ -0,0 +1,71 @@
+import threading
+from multiprocessing.connection import Client
+from typing import List, Union
+import numpy as np
+from ..config import settings
+
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# The model is loaded on first use, once per process
+_model = None
+_model_lock = threading.Lock()
+
+# One connection to the shared embedding worker per thread
+_worker = threading.local()
+
+
+def get_embedding_model():
+    """Load the SentenceTransformer model lazily (thread-safe singleton)"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
+                _model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+    return _model
+
+
+def parse_worker_address(address: str):
+    """"host:port" for TCP, anything else is a Unix socket path"""
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit():
+        return host, int(port)
+    return address
+
+
+def worker_authkey() -> bytes:
+    return (settings.EMBEDDING_WORKER_AUTHKEY or settings.SECRET_KEY).encode("utf-8")
+
+
+class EmbeddingService:
+    """Encodes text with the local model, or with the shared embedding
+    worker process when EMBEDDING_WORKER_ADDRESS is set"""
+    
+    @staticmethod
+    def _call_worker(*request):
+        connection = getattr(_worker, "connection", None)
+        if connection is None:
+            connection = Client(parse_worker_address(settings.EMBEDDING_WORKER_ADDRESS), authkey=worker_authkey())
+            _worker.connection = connection
+        try:
+            connection.send(request)
+            status, payload = connection.recv()
+        except (EOFError, OSError):
+            _worker.connection = None
+            connection.close()
+            raise
+        if status != "ok":
+            raise RuntimeError(f"Embedding worker error: {payload}")
+        return payload
+    
+    @staticmethod
+    def encode(texts: Union[str, List[str]], batch_size: int = 32) -> np.ndarray:
+        """Encode one text (-> 1-D vector) or a list of texts (-> 2-D matrix) as float32"""
+        if settings.EMBEDDING_WORKER_ADDRESS:
+            try:
+                return EmbeddingService._call_worker("encode", texts, batch_size)
+            except (EOFError, OSError, RuntimeError) as e:
+                print(f"Embedding worker unavailable, encoding locally: {e}")
+        
+        embeddings = get_embedding_model().encode(texts, batch_size=batch_size)
+        return np.asarray(embeddings, dtype=np.float32)
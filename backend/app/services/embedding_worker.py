@@ -0,0 +1,56 @@
+"""
+Shared embedding worker: hosts one SentenceTransformer for every API worker.
+
+Run it next to uvicorn and point the API at it:
+
+    python -m app.services.embedding_worker --address 127.0.0.1:7861
+    EMBEDDING_WORKER_ADDRESS=127.0.0.1:7861 uvicorn app.main:app --workers 4
+"""
+import argparse
+import threading
+from multiprocessing.connection import Listener
+import numpy as np
+from ..config import settings
+from .embedding_service import get_embedding_model, parse_worker_address, worker_authkey
+
+
+def handle_connection(connection):
+    """Serve encode requests until the client disconnects"""
+    model = get_embedding_model()
+    with connection:
+        while True:
+            try:
+                request = connection.recv()
+            except (EOFError, OSError):
+                return
+            
+            try:
+                if request[0] == "encode":
+                    _, texts, batch_size = request
+                    result = np.asarray(model.encode(texts, batch_size=batch_size), dtype=np.float32)
+                else:
+                    raise ValueError(f"Unknown request: {request[0]}")
+                connection.send(("ok", result))
+            except Exception as e:
+                connection.send(("error", str(e)))
+
+
+def serve(address: str):
+    """Accept connections forever, one thread per client connection"""
+    get_embedding_model()  # Load before accepting so the first request is fast
+    with Listener(parse_worker_address(address), authkey=worker_authkey()) as listener:
+        print(f"✅ Embedding worker listening on {address}")
+        while True:
+            try:
+                connection = listener.accept()
+            except Exception as e:  # e.g. a client with the wrong authkey
+                print(f"Rejected embedding worker connection: {e}")
+                continue
+            threading.Thread(target=handle_connection, args=(connection,), daemon=True).start()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared SentenceTransformer embedding worker")
+    parser.add_argument("--address", default=settings.EMBEDDING_WORKER_ADDRESS or "127.0.0.1:7861")
+    args = parser.parse_args()
+    serve(args.address)
@@ -0,0 +1,149 @@
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+from sqlalchemy.orm import Session
+from ..models.explanation_cache import CachedExplanation
+from ..config import settings
+from ..utils.upsert import upsert
+
+# Bump when the explanation prompt changes so old entries stop matching
+PROMPT_VERSION = 1
+SCORE_BUCKET = 0.05
+
+
+class ExplanationCacheService:
+    """Two-tier (in-process LRU + database) cache for buddy match explanations"""
+    
+    # In-memory LRU tier, shared by all requests in this process: key -> (explanation, expires_at)
+    _memory: "OrderedDict[str, Tuple[str, datetime]]" = OrderedDict()
+    _lock = threading.Lock()
+    _writes_since_eviction = 0
+    
+    # Counters for monitoring
+    stats_counters: Dict[str, int] = {"memory_hits": 0, "db_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+    
+    @staticmethod
+    def bucket_score(score: float) -> float:
+        """Round a compatibility score so near-identical pairs share an entry"""
+        return round(round(float(score) / SCORE_BUCKET) * SCORE_BUCKET, 2)
+    
+    @staticmethod
+    def make_key(
+        student1: Dict[str, List[str]], student2: Dict[str, List[str]],
+        shared_subjects: List[str], complementary: List[str], score: float
+    ) -> str:
+        """Hash the normalized prompt inputs (each student: subjects, strengths, weaknesses)"""
+        def normalize(values):
+            return sorted({str(value).strip().lower() for value in values or []})
+        
+        def normalize_student(student):
+            return {field: normalize(student.get(field)) for field in ("subjects", "strengths", "weaknesses")}
+        
+        payload = json.dumps({
+            "version": PROMPT_VERSION,
+            "student1": normalize_student(student1),
+            "student2": normalize_student(student2),
+            "shared_subjects": normalize(shared_subjects),
+            "complementary": normalize(complementary),
+            "score": ExplanationCacheService.bucket_score(score),
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def _remember(key: str, explanation: str, expires_at: datetime):
+        cache = ExplanationCacheService._memory
+        with ExplanationCacheService._lock:
+            cache[key] = (explanation, expires_at)
+            cache.move_to_end(key)
+            while len(cache) > settings.EXPLANATION_CACHE_SIZE:
+                cache.popitem(last=False)
+    
+    @staticmethod
+    def get_many(db: Session, keys: List[str]) -> Dict[str, str]:
+        """Look keys up in memory first, then in one database query"""
+        counters = ExplanationCacheService.stats_counters
+        found = {}
+        now = datetime.utcnow()
+        with ExplanationCacheService._lock:
+            memory = ExplanationCacheService._memory
+            for key in keys:
+                entry = memory.get(key)
+                if entry is None:
+                    continue
+                explanation, expires_at = entry
+                if expires_at <= now:
+                    del memory[key]
+                    continue
+                memory.move_to_end(key)
+                found[key] = explanation
+                counters["memory_hits"] += 1
+        
+        remaining = list({key for key in keys if key not in found})
+        if remaining:
+            rows = db.query(CachedExplanation).filter(
+                CachedExplanation.cache_key.in_(remaining),
+                CachedExplanation.expires_at > now
+            ).all()
+            for row in rows:
+                found[row.cache_key] = row.explanation
+                # SQLite hands back naive UTC datetimes, PostgreSQL aware ones
+                expires_at = row.expires_at
+                if expires_at.tzinfo is not None:
+                    expires_at = expires_at.astimezone(timezone.utc).replace(tzinfo=None)
+                ExplanationCacheService._remember(row.cache_key, row.explanation, expires_at)
+            
+            with ExplanationCacheService._lock:
+                counters["db_hits"] += len(rows)
+                counters["misses"] += len(remaining) - len(rows)
+        return found
+    
+    @staticmethod
+    def put_many(db: Session, entries: Dict[str, str]):
+        """Store explanations in both tiers (caller commits)"""
+        if not entries:
+            return
+        expires_at = datetime.utcnow() + timedelta(hours=settings.EXPLANATION_CACHE_TTL_HOURS)
+        rows = [
+            {"cache_key": key, "explanation": explanation, "expires_at": expires_at}
+            for key, explanation in entries.items()
+        ]
+        # Upsert so concurrent misses on the same key don't collide on the primary key
+        upsert(db, CachedExplanation, rows, ["cache_key"])
+        for key, explanation in entries.items():
+            ExplanationCacheService._remember(key, explanation, expires_at)
+        
+        with ExplanationCacheService._lock:
+            ExplanationCacheService.stats_counters["writes"] += len(entries)
+            ExplanationCacheService._writes_since_eviction += len(entries)
+            evict = ExplanationCacheService._writes_since_eviction >= 100
+            if evict:
+                ExplanationCacheService._writes_since_eviction = 0
+        if evict:
+            ExplanationCacheService.evict_expired(db)
+    
+    @staticmethod
+    def evict_expired(db: Session) -> int:
+        """Delete expired rows from the persistent tier (caller commits)"""
+        deleted = db.query(CachedExplanation).filter(
+            CachedExplanation.expires_at <= datetime.utcnow()
+        ).delete(synchronize_session=False)
+        with ExplanationCacheService._lock:
+            ExplanationCacheService.stats_counters["evictions"] += deleted
+        return deleted
+    
+    @staticmethod
+    def get_stats() -> Dict:
+        """Hit/miss counters for monitoring"""
+        with ExplanationCacheService._lock:
+            counters = dict(ExplanationCacheService.stats_counters)
+            memory_size = len(ExplanationCacheService._memory)
+        lookups = counters["memory_hits"] + counters["db_hits"] + counters["misses"]
+        hits = counters["memory_hits"] + counters["db_hits"]
+        return {
+            **counters,
+            "memory_size": memory_size,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+        }
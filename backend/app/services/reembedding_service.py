@@ -0,0 +1,106 @@
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from ..models.user import User
+from ..models.user_embedding import UserEmbedding
+from .buddy_matching_service import BuddyMatchingService
+from .embedding_service import get_embedding_model
+from ..utils.upsert import upsert
+
+
+def _encode_texts(texts: List[str], batch_size: int) -> np.ndarray:
+    """Pool task: encode with this process's own copy of the model"""
+    return np.asarray(get_embedding_model().encode(texts, batch_size=batch_size), dtype=np.float32)
+
+
+def _init_worker():
+    # Load the model once per worker process, not once per task
+    get_embedding_model()
+
+
+class ReembeddingService:
+    """Bulk re-embedding of study profiles across a process pool"""
+    
+    @staticmethod
+    def upsert_embeddings(db: Session, rows: List[Dict]):
+        """Insert or update user_embeddings rows in one statement (caller commits)"""
+        if not rows:
+            return
+        upsert(db, UserEmbedding, rows, ["user_id"], {"updated_at": func.now()})
+    
+    @staticmethod
+    def reembed_all(
+        db: Session,
+        chunk_size: int = 1000,
+        batch_size: int = 64,
+        workers: int = None,
+        force: bool = False,
+        verbose: bool = True
+    ) -> Dict:
+        """Re-embed every profile (or only changed ones) and return throughput metrics"""
+        workers = workers or os.cpu_count() or 1
+        started = time.perf_counter()
+        total = db.query(func.count(User.id)).filter(User.subjects.isnot(None)).scalar() or 0
+        scanned = encoded = 0
+        last_user_id = 0
+        
+        # spawn: each worker imports the model itself instead of inheriting a forked copy
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+            while True:
+                # Stream users in keyset-paginated chunks, profile columns only
+                users = db.query(
+                    User.id, User.subjects, User.strengths, User.weaknesses, User.study_patterns
+                ).filter(
+                    User.id > last_user_id,
+                    User.subjects.isnot(None)
+                ).order_by(User.id).limit(chunk_size).all()
+                if not users:
+                    break
+                last_user_id = users[-1].id
+                scanned += len(users)
+                
+                hashes = {user.id: BuddyMatchingService.profile_hash(user) for user in users}
+                if not force:
+                    stored = dict(db.query(UserEmbedding.user_id, UserEmbedding.profile_hash).filter(
+                        UserEmbedding.user_id.in_(list(hashes))
+                    ).all())
+                    users = [user for user in users if stored.get(user.id) != hashes[user.id]]
+                if not users:
+                    continue
+                
+                # Split the chunk evenly across the pool
+                texts = [BuddyMatchingService.build_profile_text(user) for user in users]
+                slice_size = max(batch_size, -(-len(texts) // workers))
+                slices = [texts[i:i + slice_size] for i in range(0, len(texts), slice_size)]
+                vectors = np.vstack(list(pool.map(_encode_texts, slices, [batch_size] * len(slices))))
+                
+                ReembeddingService.upsert_embeddings(db, [
+                    {
+                        "user_id": user.id,
+                        "profile_hash": hashes[user.id],
+                        "embedding": vector.tobytes(),
+                        "dimension": int(vector.shape[0])
+                    }
+                    for user, vector in zip(users, vectors)
+                ])
+                db.commit()
+                encoded += len(users)
+                
+                if verbose:
+                    elapsed = time.perf_counter() - started
+                    print(f"  {scanned}/{total} scanned, {encoded} encoded ({encoded / elapsed:.1f} profiles/s)")
+        
+        elapsed = time.perf_counter() - started
+        return {
+            "scanned": scanned,
+            "encoded": encoded,
+            "workers": workers,
+            "seconds": round(elapsed, 3),
+            "profiles_per_second": round(encoded / elapsed, 1) if elapsed else 0.0
+        }
@@ -1,13 +1,23 @@
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
+from fastapi import HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from sqlalchemy import func, or_, case, cast, Float
 from decimal import Decimal
-from ..models.resource import Resource
+from ..models.resource import Resource, resource_search
 from ..models.resource_unit import ResourceUnit
 from ..models.purchase import Purchase
 from ..models.review import Review
 from ..models.wallet import Wallet
 from ..models.user import User
+from ..utils.pagination import encode_cursor, decode_cursor, keyset_after
+from .download_counter_service import DownloadCounterService
+
+# Browse sort orders (newest/highest first); each has a matching index on Resource
+BROWSE_SORT_KEYS = {
+    "recent": (Resource.created_at, Resource.id),
+    "popular": (Resource.total_downloads, Resource.id),
+    "rating": (Resource.average_rating, Resource.id),
+}
 
 
 class ResourceService:
@@ -55,9 +65,21 @@ class ResourceService:
         min_rating: float = None,
         sort_by: str = "recent",  # recent, popular, rating
         limit: int = 20,
-        offset: int = 0
-    ) -> List[Resource]:
-        """Browse marketplace with filters"""
+        offset: int = 0,
+        cursor: str = None
+    ) -> Tuple[List[Resource], Optional[str]]:
+        """Browse marketplace with filters (searches are ranked by relevance)
+        
+        Returns the resources and the cursor for the next page (None on the last
+        page, and for searches, which page by offset).
+        """
+        if search:
+            resources = ResourceService.search_resources(
+                db, search, subject, category, min_rating, limit, offset
+            )
+            if resources is not None:
+                return resources, None
+        
         query = db.query(Resource).filter(
             Resource.is_active == True,
             Resource.is_approved == True
@@ -69,6 +91,7 @@ class ResourceService:
         if category:
             query = query.filter(Resource.category == category)
         if search:
+            # Fallback for databases without a full-text index
             query = query.filter(
                 or_(
                     Resource.title.ilike(f"%{search}%"),
@@ -78,15 +101,64 @@ class ResourceService:
         if min_rating:
             query = query.filter(Resource.average_rating >= min_rating)
         
-        # Apply sorting
-        if sort_by == "popular":
-            query = query.order_by(Resource.total_downloads.desc())
-        elif sort_by == "rating":
-            query = query.order_by(Resource.average_rating.desc())
-        else:  # recent
-            query = query.order_by(Resource.created_at.desc())
+        # Apply sorting; id breaks ties so every row has a unique position
+        if sort_by not in BROWSE_SORT_KEYS:
+            sort_by = "recent"
+        order = BROWSE_SORT_KEYS[sort_by]
+        query = query.order_by(*[column.desc() for column in order])
+        if cursor:
+            # The cursor carries its sort order so it can't be replayed against another one
+            cursor_sort, *values = decode_cursor(cursor, len(order) + 1)
+            if cursor_sort != sort_by:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            query = query.filter(keyset_after(order, values, dialect=db.bind.dialect.name))
+        elif offset:
+            query = query.offset(offset)
+        
+        resources = query.limit(limit + 1).all()
         
-        return query.limit(limit).offset(offset).all()
+        next_cursor = None
+        if len(resources) > limit:
+            resources = resources[:limit]
+            next_cursor = encode_cursor([sort_by] + [getattr(resources[-1], column.key) for column in order])
+        return resources, next_cursor
+    
+    @staticmethod
+    def search_resources(
+        db: Session,
+        search: str,
+        subject: str = None,
+        category: str = None,
+        min_rating: float = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> Optional[List[Resource]]:
+        """Full-text search with BM25-style ranking; every word also matches as a prefix
+        for type-ahead. Returns None if the database has no full-text index."""
+        conditions = ["t.is_active = :is_active", "t.is_approved = :is_approved"]
+        params = {"is_active": True, "is_approved": True}
+        if subject:
+            conditions.append("t.subject = :subject")
+            params["subject"] = subject
+        if category:
+            conditions.append("t.category = :category")
+            params["category"] = category
+        if min_rating:
+            conditions.append("t.average_rating >= :min_rating")
+            params["min_rating"] = min_rating
+        
+        hits = resource_search.search(
+            db, search, where=" AND ".join(conditions), params=params,
+            limit=limit, offset=offset, prefix=True
+        )
+        if hits is None:
+            return None
+        
+        resources = {
+            resource.id: resource
+            for resource in db.query(Resource).filter(Resource.id.in_([hit.id for hit in hits]))
+        }
+        return [resources[hit.id] for hit in hits if hit.id in resources]
     
     @staticmethod
     def add_unit(
@@ -193,11 +265,11 @@ class ResourceService:
         wallet.balance += seller_earnings
         wallet.total_earned += seller_earnings
         
-        # Update download count
-        unit.download_count += 1
-        
         db.commit()
         db.refresh(purchase)
+        
+        # Count the download once the purchase is committed (buffered, written in batches)
+        DownloadCounterService.record(unit.id, unit.resource_id)
         return purchase
     
     @staticmethod
@@ -237,6 +309,22 @@ class ResourceService:
         if existing_review:
             raise ValueError("You already reviewed this resource")
         
+        # Update the resource's rating stats in one statement, before the review is flushed.
+        # Rows from before rating_sum existed are counted once from their reviews.
+        legacy_sum = db.query(func.coalesce(func.sum(Review.rating), 0)).filter(
+            Review.resource_id == resource_id
+        ).scalar_subquery()
+        legacy_count = db.query(func.count(Review.id)).filter(
+            Review.resource_id == resource_id
+        ).scalar_subquery()
+        rating_sum = func.coalesce(Resource.rating_sum, legacy_sum) + rating
+        total_reviews = case((Resource.rating_sum.is_(None), legacy_count), else_=Resource.total_reviews) + 1
+        db.query(Resource).filter(Resource.id == resource_id).update({
+            Resource.rating_sum: rating_sum,
+            Resource.total_reviews: total_reviews,
+            Resource.average_rating: cast(rating_sum, Float) / total_reviews
+        }, synchronize_session=False)
+        
         review = Review(
             user_id=user_id,
             resource_id=resource_id,
@@ -245,21 +333,77 @@ class ResourceService:
         )
         db.add(review)
         
-        # Update resource average rating
-        resource = db.query(Resource).filter(Resource.id == resource_id).first()
-        if resource:
-            avg_rating = db.query(func.avg(Review.rating)).filter(
-                Review.resource_id == resource_id
-            ).scalar()
-            resource.average_rating = float(avg_rating) if avg_rating else 0.0
-            resource.total_reviews = db.query(Review).filter(
-                Review.resource_id == resource_id
-            ).count() + 1
-        
         db.commit()
         db.refresh(review)
         return review
     
+    @staticmethod
+    def reconcile_rating_stats(db: Session, batch_size: int = 500, fix: bool = True) -> Dict:
+        """Recompute every resource's rating stats from its reviews and report (and fix) drift"""
+        metrics = {"resources": 0, "drifted": 0, "fixed": 0}
+        last_id = 0
+        while True:
+            resources = db.query(Resource).filter(Resource.id > last_id).order_by(Resource.id).limit(batch_size).all()
+            if not resources:
+                break
+            last_id = resources[-1].id
+            
+            stats = {
+                resource_id: (int(rating_sum), count)
+                for resource_id, rating_sum, count in db.query(
+                    Review.resource_id, func.sum(Review.rating), func.count(Review.id)
+                ).filter(Review.resource_id.in_([resource.id for resource in resources])).group_by(Review.resource_id)
+            }
+            drifted = []
+            for resource in resources:
+                rating_sum, count = stats.get(resource.id, (0, 0))
+                average = rating_sum / count if count else 0.0
+                metrics["resources"] += 1
+                # Legacy rows have NULL stats until their first review; NULL means 0 here
+                if (
+                    (resource.rating_sum or 0) == rating_sum
+                    and (resource.total_reviews or 0) == count
+                    and abs((resource.average_rating or 0.0) - average) < 1e-9
+                ):
+                    continue
+                
+                drifted.append(resource.id)
+                print(
+                    f"Rating drift on resource {resource.id}: stored sum={resource.rating_sum} "
+                    f"count={resource.total_reviews} avg={resource.average_rating}, "
+                    f"actual sum={rating_sum} count={count} avg={average:.4f}"
+                )
+            metrics["drifted"] += len(drifted)
+            
+            if fix and drifted:
+                # Recompute inside the UPDATE so reviews added since the read aren't lost
+                actual_sum = db.query(func.coalesce(func.sum(Review.rating), 0)).filter(
+                    Review.resource_id == Resource.id
+                ).scalar_subquery()
+                actual_count = db.query(func.count(Review.id)).filter(
+                    Review.resource_id == Resource.id
+                ).scalar_subquery()
+                metrics["fixed"] += db.query(Resource).filter(Resource.id.in_(drifted)).update({
+                    Resource.rating_sum: actual_sum,
+                    Resource.total_reviews: actual_count,
+                    Resource.average_rating: func.coalesce(
+                        db.query(func.avg(Review.rating)).filter(Review.resource_id == Resource.id).scalar_subquery(), 0.0
+                    )
+                }, synchronize_session=False)
+                db.commit()
+            else:
+                db.rollback()
+            db.expunge_all()
+        return metrics
+    
+    @staticmethod
+    def get_resource_reviews(db: Session, resource_id: int) -> List[Review]:
+        """Get approved reviews for a resource, newest first"""
+        return db.query(Review).filter(
+            Review.resource_id == resource_id,
+            Review.is_approved == True
+        ).order_by(Review.created_at.desc()).all()
+    
     @staticmethod
     def get_user_purchases(db: Session, user_id: int) -> List[Purchase]:
         """Get all purchases made by a user"""
@@ -0,0 +1,100 @@
+import json
+import time
+from collections import defaultdict
+from typing import Dict, List
+import numpy as np
+from sqlalchemy.orm import Session
+from ..models.user import User
+from ..models.user_embedding import UserEmbedding
+from ..models.buddy_match import StudyGroup
+from .vector_index import normalize_rows
+
+
+class StudyGroupService:
+    """Batch study-group formation over stored profile embeddings"""
+    
+    @staticmethod
+    def split_balanced(vectors: np.ndarray, max_size: int, iterations: int = 5) -> List[np.ndarray]:
+        """Partition rows into groups of at most `max_size` similar vectors.
+        
+        Recursive balanced bisection: each set is split in half along the
+        axis between two 2-means centroids, so every pass is O(n * d) and
+        the whole partition is O(n * d * log n). Leaves end up between
+        max_size / 2 and max_size rows (when there are enough rows).
+        """
+        groups = []
+        stack = [np.arange(len(vectors))]
+        while stack:
+            rows = stack.pop()
+            if len(rows) <= max_size:
+                groups.append(rows)
+                continue
+            
+            subset = vectors[rows]
+            # Seed with the row farthest from the mean and the row farthest from that one
+            first = subset[np.argmin(subset @ subset.mean(axis=0))]
+            second = subset[np.argmin(subset @ first)]
+            centroids = np.vstack([first, second])
+            for _ in range(iterations):
+                labels = np.argmax(subset @ centroids.T, axis=1)
+                for c in range(2):
+                    if np.any(labels == c):
+                        centroids[c] = normalize_rows(subset[labels == c].sum(axis=0))
+            
+            # Cut at the median of the preference margin so both halves are equal-sized
+            margin = subset @ (centroids[0] - centroids[1])
+            order = np.argsort(-margin)
+            half = len(rows) // 2
+            stack.append(rows[order[:half]])
+            stack.append(rows[order[half:]])
+        return groups
+    
+    @staticmethod
+    def form_groups(db: Session, max_size: int = 5, min_size: int = 2, replace: bool = True) -> Dict:
+        """Cluster users per subject by profile embedding and write StudyGroup rows"""
+        started = time.perf_counter()
+        
+        # One pass over the profiles and their stored embeddings
+        rows = db.query(User.id, User.subjects, UserEmbedding.embedding).join(
+            UserEmbedding, UserEmbedding.user_id == User.id
+        ).filter(
+            User.subjects.isnot(None),
+            User.is_active == True
+        ).all()
+        if not rows:
+            return {"users": 0, "subjects": 0, "groups": 0, "seconds": 0.0}
+        
+        user_ids = np.asarray([row.id for row in rows], dtype=np.int64)
+        vectors = normalize_rows(np.vstack([np.frombuffer(row.embedding, dtype=np.float32) for row in rows]))
+        
+        members_by_subject = defaultdict(list)
+        for position, row in enumerate(rows):
+            for subject in set(json.loads(row.subjects)):
+                members_by_subject[subject].append(position)
+        
+        if replace:
+            db.query(StudyGroup).filter(
+                StudyGroup.subject.in_(list(members_by_subject))
+            ).delete(synchronize_session=False)
+        
+        mappings = []
+        for subject, positions in sorted(members_by_subject.items()):
+            positions = np.asarray(positions)
+            groups = StudyGroupService.split_balanced(vectors[positions], max_size)
+            groups = [group for group in groups if len(group) >= min_size]
+            for number, group in enumerate(groups, start=1):
+                mappings.append({
+                    "name": f"{subject} Study Group {number}",
+                    "subject": subject,
+                    "member_ids": json.dumps(sorted(int(user_id) for user_id in user_ids[positions[group]]))
+                })
+        
+        db.bulk_insert_mappings(StudyGroup, mappings)
+        db.commit()
+        
+        return {
+            "users": len(rows),
+            "subjects": len(members_by_subject),
+            "groups": len(mappings),
+            "seconds": round(time.perf_counter() - started, 3)
+        }
@@ -0,0 +1,185 @@
+import re
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from groq import Groq
+from ..config import settings
+
+groq_client = Groq(api_key=settings.GROQ_API_KEY) if settings.GROQ_API_KEY else None
+
+SUMMARY_MODEL = "llama-3.1-8b-instant"
+# Bump when a summary prompt changes so cached summaries stop matching
+SUMMARY_PROMPT_VERSION = 2
+MAX_REDUCE_ROUNDS = 3
+
+SUMMARY_JSON_FORMAT = """Format your response as JSON:
+{
+    "summary": "...",
+    "key_points": ["point 1", "point 2", ...]
+}
+"""
+
+
+class SummaryService:
+    """Map-reduce summarization: long transcripts are split into token-bounded sections,
+    summarized concurrently, and the section summaries reduced into the final summary"""
+    
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Rough token count (about 4 characters per token for English)"""
+        return len(text) // 4 + 1
+    
+    @staticmethod
+    def split_sections(text: str, max_tokens: int = None) -> List[str]:
+        """Split text at sentence boundaries into sections of at most ~max_tokens"""
+        max_tokens = max_tokens or settings.SUMMARY_SECTION_TOKENS
+        if SummaryService.estimate_tokens(text) <= max_tokens:
+            return [text] if text.strip() else []
+        
+        sections, current, current_tokens = [], [], 0
+        for sentence in re.split(r"(?<=[.!?])\s+", text.strip()):
+            # Hard-wrap run-on "sentences" (transcripts without punctuation)
+            pieces = [sentence]
+            if SummaryService.estimate_tokens(sentence) > max_tokens:
+                words = sentence.split()
+                step = max(1, max_tokens * 3 // 4)  # ~0.75 words per token
+                pieces = [" ".join(words[i:i + step]) for i in range(0, len(words), step)]
+            
+            for piece in pieces:
+                tokens = SummaryService.estimate_tokens(piece)
+                if current and current_tokens + tokens > max_tokens:
+                    sections.append(" ".join(current))
+                    current, current_tokens = [], 0
+                current.append(piece)
+                current_tokens += tokens
+        if current:
+            sections.append(" ".join(current))
+        return sections
+    
+    @staticmethod
+    def section_hash(text: str) -> str:
+        """Key for a stored section summary (prompt version + model + section text)"""
+        payload = f"v{SUMMARY_PROMPT_VERSION}\x1f{SUMMARY_MODEL}\x1f{text}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def _parse_json(content: str) -> Dict:
+        content = content.strip()
+        # Extract JSON from response
+        if "```json" in content:
+            content = content.split("```json")[1].split("```")[0].strip()
+        elif "```" in content:
+            content = content.split("```")[1].split("```")[0].strip()
+        return json.loads(content)
+    
+    @staticmethod
+    def _complete(system: str, prompt: str, max_tokens: int) -> str:
+        response = groq_client.chat.completions.create(
+            model=SUMMARY_MODEL,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=max_tokens,
+            temperature=0.5
+        )
+        return response.choices[0].message.content.strip()
+    
+    @staticmethod
+    def summarize_section(text: str) -> str:
+        """Map step: plain-text summary of one section"""
+        prompt = f"""Summarize this part of a lecture transcription in 3-5 sentences.
+Keep definitions, formulas, names and examples. Respond with the summary only.
+
+Transcription part:
+{text}
+"""
+        return SummaryService._complete(
+            "You are a helpful study assistant that summarizes lecture notes.", prompt, 300
+        )
+    
+    @staticmethod
+    def final_summary(text: str, from_sections: bool = False) -> Dict:
+        """Reduce step (or the only step for short transcripts): summary and key points as JSON"""
+        if from_sections:
+            source = f"""These are summaries of consecutive parts of one lecture, in order:
+{text}"""
+        else:
+            source = f"""Transcription:
+{text}"""
+        
+        prompt = f"""Analyze this study note and provide:
+1. A concise summary (2-3 sentences)
+2. Key points (bullet list, 3-5 main points)
+
+{source}
+
+""" + SUMMARY_JSON_FORMAT
+        content = SummaryService._complete(
+            "You are a helpful study assistant that summarizes lecture notes. Always respond with valid JSON.",
+            prompt, 500
+        )
+        return SummaryService._parse_json(content)
+    
+    @staticmethod
+    def _map(texts: List[str]) -> List[str]:
+        if not texts:
+            return []
+        workers = max(1, min(settings.SUMMARY_CONCURRENCY, len(texts)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(SummaryService.summarize_section, texts))
+    
+    @staticmethod
+    def summarize(transcription: str, known: Optional[Dict[str, str]] = None) -> Tuple[Dict, List[Tuple[str, str]]]:
+        """Summarize a transcript (raises on API errors).
+        
+        `known` maps section hashes to stored section summaries, which are reused
+        instead of calling the model again. Returns the summary data and the
+        (section hash, section summary) list, empty when the transcript fits one prompt.
+        """
+        if not groq_client:
+            return {
+                "summary": "AI summarization unavailable - API key not configured",
+                "key_points": []
+            }, []
+        
+        max_tokens = settings.SUMMARY_SECTION_TOKENS
+        sections = SummaryService.split_sections(transcription, max_tokens)
+        if len(sections) <= 1:
+            return SummaryService.final_summary(transcription), []
+        
+        # Map: summarize sections concurrently, skipping ones summarized before
+        known = known or {}
+        hashes = [SummaryService.section_hash(section) for section in sections]
+        missing = [i for i, section_hash in enumerate(hashes) if section_hash not in known]
+        new_summaries = dict(zip(missing, SummaryService._map([sections[i] for i in missing])))
+        section_summaries = [known.get(section_hash) or new_summaries[i] for i, section_hash in enumerate(hashes)]
+        
+        # Reduce: fold partial summaries until they fit in one prompt
+        partials = section_summaries
+        for _ in range(MAX_REDUCE_ROUNDS):
+            if SummaryService.estimate_tokens("\n\n".join(partials)) <= max_tokens or len(partials) <= 1:
+                break
+            partials = SummaryService._map(SummaryService.split_sections("\n\n".join(partials), max_tokens))
+        
+        summary_data = SummaryService.final_summary("\n\n".join(partials), from_sections=True)
+        return summary_data, list(zip(hashes, section_summaries))
+    
+    @staticmethod
+    def answer_question(context: str, question: str) -> str:
+        """Answer a follow-up question about a note from its (section) summaries"""
+        if not groq_client:
+            return "AI answers unavailable - API key not configured"
+        
+        prompt = f"""Answer the student's question using only these notes from their lecture.
+If the notes don't cover it, say so.
+
+Notes:
+{context}
+
+Question: {question}
+"""
+        return SummaryService._complete(
+            "You are a helpful study assistant answering questions about a student's lecture notes.", prompt, 400
+        )
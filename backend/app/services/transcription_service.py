@@ -0,0 +1,209 @@
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from groq import Groq
+from ..config import settings
+
+# Window to search for the overlap at the start of each chunk, in words
+MAX_OVERLAP_WORDS = 80
+MIN_OVERLAP_WORDS = 2
+MAX_BOUNDARY_SKIP = 3  # words at the start of a chunk that may be cut off mid-word
+
+
+class Transcriber:
+    """Speech-to-text backend for a single audio file"""
+    name = "base"
+    
+    @property
+    def available(self) -> bool:
+        """Whether results come from a real backend (placeholders are never cached)"""
+        return True
+    
+    @property
+    def cache_name(self) -> str:
+        """Identifies the backend and model in transcription cache keys"""
+        return self.name
+    
+    def transcribe(self, file_path: str) -> str:
+        raise NotImplementedError
+
+
+class GroqTranscriber(Transcriber):
+    """Groq-hosted Whisper"""
+    name = "groq"
+    
+    def __init__(self, api_key: Optional[str] = None, model: str = "whisper-large-v3"):
+        api_key = api_key or settings.GROQ_API_KEY
+        self.client = Groq(api_key=api_key) if api_key else None
+        self.model = model
+    
+    @property
+    def available(self) -> bool:
+        return self.client is not None
+    
+    @property
+    def cache_name(self) -> str:
+        return f"{self.name}:{self.model}"
+    
+    def transcribe(self, file_path: str) -> str:
+        if not self.client:
+            return "Transcription unavailable - API key not configured"
+        
+        with open(file_path, "rb") as audio_file:
+            return self.client.audio.transcriptions.create(
+                model=self.model,
+                file=audio_file,
+                response_format="text"
+            )
+
+
+class StubTranscriber(Transcriber):
+    """Offline transcriber for tests and local development (no API calls)"""
+    name = "stub"
+    
+    def transcribe(self, file_path: str) -> str:
+        return f"Stub transcript of {os.path.basename(file_path)}"
+
+
+TRANSCRIBERS = {
+    "groq": GroqTranscriber,
+    "stub": StubTranscriber,
+}
+
+_transcriber: Optional[Transcriber] = None
+
+
+def get_transcriber() -> Transcriber:
+    """Get the transcriber selected by `TRANSCRIBER`"""
+    global _transcriber
+    if _transcriber is None:
+        if settings.TRANSCRIBER not in TRANSCRIBERS:
+            raise ValueError(f"Unknown transcriber '{settings.TRANSCRIBER}'. Options: {', '.join(TRANSCRIBERS)}")
+        _transcriber = TRANSCRIBERS[settings.TRANSCRIBER]()
+    return _transcriber
+
+
+def _normalize_word(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def stitch_transcripts(parts: List[str]) -> str:
+    """Join chunk transcripts in order, dropping the words repeated in each overlap.
+    
+    The overlap is the longest run of words that ends the text so far and
+    starts the next chunk (allowing a few cut-off words at the chunk start),
+    compared case- and punctuation-insensitively.
+    """
+    words: List[str] = []
+    for part in parts:
+        next_words = part.split()
+        if not next_words:
+            continue
+        if not words:
+            words.extend(next_words)
+            continue
+        
+        tail = [_normalize_word(w) for w in words[-MAX_OVERLAP_WORDS:]]
+        head = [_normalize_word(w) for w in next_words[:MAX_OVERLAP_WORDS + MAX_BOUNDARY_SKIP]]
+        
+        best_end = 0
+        best_length = 0
+        for skip in range(min(MAX_BOUNDARY_SKIP, len(head)) + 1):
+            for length in range(min(len(tail), len(head) - skip), best_length, -1):
+                if tail[-length:] == head[skip:skip + length]:
+                    best_length = length
+                    best_end = skip + length
+                    break
+        
+        if best_length >= MIN_OVERLAP_WORDS:
+            next_words = next_words[best_end:]
+        words.extend(next_words)
+    
+    return " ".join(words)
+
+
+class TranscriptionService:
+    @staticmethod
+    def ffmpeg_available() -> bool:
+        """Check whether ffmpeg and ffprobe are on PATH"""
+        return shutil.which("ffmpeg") is not None and shutil.which("ffprobe") is not None
+    
+    @staticmethod
+    def probe_duration(file_path: str) -> Optional[float]:
+        """Audio duration in seconds via ffprobe, or None if it can't be read"""
+        try:
+            result = subprocess.run(
+                ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+                 "-of", "default=noprint_wrappers=1:nokey=1", file_path],
+                capture_output=True, text=True, check=True
+            )
+            return float(result.stdout.strip())
+        except (OSError, subprocess.CalledProcessError, ValueError):
+            return None
+    
+    @staticmethod
+    def chunk_windows(duration: float, chunk_seconds: float, overlap_seconds: float) -> List[Tuple[float, float]]:
+        """(start, length) windows covering `duration`, each overlapping the previous one"""
+        step = max(chunk_seconds - overlap_seconds, 1.0)
+        windows = []
+        start = 0.0
+        while start < duration:
+            # Stretch the last window rather than leave a sliver that is all overlap
+            if duration - start <= chunk_seconds + overlap_seconds:
+                windows.append((start, duration - start))
+                break
+            windows.append((start, chunk_seconds))
+            start += step
+        return windows
+    
+    @staticmethod
+    def split_audio(file_path: str, windows: List[Tuple[float, float]], output_dir: str) -> List[str]:
+        """Cut each window into a 16 kHz mono FLAC chunk"""
+        chunk_paths = []
+        for i, (start, length) in enumerate(windows):
+            chunk_path = os.path.join(output_dir, f"chunk_{i:04d}.flac")
+            subprocess.run(
+                ["ffmpeg", "-v", "error", "-y", "-ss", f"{start:.3f}", "-t", f"{length:.3f}",
+                 "-i", file_path, "-vn", "-ac", "1", "-ar", "16000", "-c:a", "flac", chunk_path],
+                check=True
+            )
+            chunk_paths.append(chunk_path)
+        return chunk_paths
+    
+    @staticmethod
+    def transcribe_chunk(transcriber: Transcriber, chunk_path: str, retries: int) -> str:
+        """Transcribe one chunk, retrying it on its own before failing the whole file"""
+        for attempt in range(retries + 1):
+            try:
+                return transcriber.transcribe(chunk_path)
+            except Exception as e:
+                if attempt == retries:
+                    raise
+                print(f"Chunk transcription error ({os.path.basename(chunk_path)}), retrying: {e}")
+    
+    @staticmethod
+    def transcribe(file_path: str, transcriber: Transcriber = None) -> str:
+        """Transcribe a recording, splitting long ones into overlapping chunks transcribed in parallel"""
+        transcriber = transcriber or get_transcriber()
+        chunk_seconds = settings.TRANSCRIPTION_CHUNK_SECONDS
+        
+        duration = TranscriptionService.probe_duration(file_path) if TranscriptionService.ffmpeg_available() else None
+        if not duration or duration <= chunk_seconds:
+            return transcriber.transcribe(file_path)
+        
+        windows = TranscriptionService.chunk_windows(duration, chunk_seconds, settings.TRANSCRIPTION_OVERLAP_SECONDS)
+        with tempfile.TemporaryDirectory(prefix="voice_chunks_") as output_dir:
+            chunk_paths = TranscriptionService.split_audio(file_path, windows, output_dir)
+            
+            workers = max(1, min(settings.TRANSCRIPTION_CONCURRENCY, len(chunk_paths)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                parts = list(pool.map(
+                    lambda path: TranscriptionService.transcribe_chunk(transcriber, path, settings.TRANSCRIPTION_CHUNK_RETRIES),
+                    chunk_paths
+                ))
+        
+        return stitch_transcripts(parts)
@@ -0,0 +1,629 @@
+import os
+import json
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:  # Optional dependency
+    hnswlib = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves from several processes aren't serialized
+    fcntl = None
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row of a matrix (float32, contiguous)"""
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        return matrix / max(float(np.linalg.norm(matrix)), 1e-12)
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first"""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.shape[0]:
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(scores.shape[0])
+    return top[np.argsort(-scores[top])]
+
+
+def _temp_path(path: str) -> str:
+    """Unique temporary file next to `path`, so concurrent writers never share one"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    os.close(fd)
+    return tmp_path
+
+
+@contextmanager
+def _save_lock(path: str):
+    """Serialize saves to the same path across processes (e.g. uvicorn workers
+    shutting down together), so multi-file indexes are never saved half from one
+    writer and half from another"""
+    if fcntl is None:
+        yield
+        return
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(f"{path}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _atomic_savez(path: str, **arrays):
+    """Write an .npz file atomically so a crash never leaves a torn index"""
+    tmp_path = _temp_path(path)
+    try:
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class VectorIndex:
+    """Base class for nearest-neighbour indexes over cosine similarity.
+
+    Vectors are keyed by an integer id (the user id) and tagged with a
+    version string (the profile hash) so a persisted index can be
+    reconciled against the database after a restart.
+    """
+    backend = "base"
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+        self.versions: Dict[int, str] = {}
+        self.lock = threading.RLock()
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self.versions)
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self.versions
+
+    def upsert(self, item_id: int, vector: np.ndarray, version: str = ""):
+        """Insert or replace a single vector"""
+        self.upsert_many([item_id], np.asarray(vector, dtype=np.float32).reshape(1, -1), [version])
+
+    def upsert_many(self, item_ids: List[int], vectors: np.ndarray, versions: List[str]):
+        raise NotImplementedError
+
+    def remove(self, item_id: int):
+        raise NotImplementedError
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (ids, scores) of the k most similar vectors, best first"""
+        raise NotImplementedError
+
+    def save(self, path: str):
+        raise NotImplementedError
+
+    @classmethod
+    def load(cls, path: str) -> "VectorIndex":
+        raise NotImplementedError
+
+
+class BruteForceIndex(VectorIndex):
+    """Exact search over one contiguous, pre-normalized matrix"""
+    backend = "brute"
+
+    def __init__(self, dimension: int):
+        super().__init__(dimension)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.vectors = np.empty((0, dimension), dtype=np.float32)
+        self.positions: Dict[int, int] = {}
+
+    def upsert_many(self, item_ids: List[int], vectors: np.ndarray, versions: List[str]) -> np.ndarray:
+        """Insert or replace vectors; returns the matrix rows that were written"""
+        vectors = normalize_rows(np.asarray(vectors).reshape(len(item_ids), -1))
+        # Last write wins if an id appears twice in one batch
+        batch = {int(item_id): (vector, version) for item_id, vector, version in zip(item_ids, vectors, versions)}
+        with self.lock:
+            rows, new_ids, new_rows = [], [], []
+            for item_id, (vector, version) in batch.items():
+                position = self.positions.get(item_id)
+                if position is not None:
+                    self.vectors[position] = vector
+                else:
+                    position = len(self.ids) + len(new_ids)
+                    self.positions[item_id] = position
+                    new_ids.append(item_id)
+                    new_rows.append(vector)
+                rows.append(position)
+                self.versions[item_id] = version
+
+            if new_ids:
+                self.ids = np.concatenate([self.ids, np.asarray(new_ids, dtype=np.int64)])
+                self.vectors = np.vstack([self.vectors, np.asarray(new_rows, dtype=np.float32)])
+            self.dirty = True
+            return np.asarray(rows, dtype=np.int64)
+
+    def remove(self, item_id: int) -> Optional[Tuple[int, int]]:
+        """Remove a vector; returns (position, last) of the row swap, if any"""
+        with self.lock:
+            position = self.positions.pop(item_id, None)
+            if position is None:
+                return None
+            # Swap the last row into the hole to keep the matrix contiguous
+            last = len(self.ids) - 1
+            if position != last:
+                self.ids[position] = self.ids[last]
+                self.vectors[position] = self.vectors[last]
+                self.positions[int(self.ids[position])] = position
+            self.ids = self.ids[:last]
+            self.vectors = self.vectors[:last]
+            self.versions.pop(item_id, None)
+            self.dirty = True
+            return position, last
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        with self.lock:
+            ids, vectors = self.ids, self.vectors
+        if not len(ids):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        scores = vectors @ normalize_rows(query)
+        top = top_k(scores, k)
+        return ids[top], scores[top]
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "ids": self.ids,
+            "vectors": self.vectors,
+            "versions": np.asarray([self.versions[int(i)] for i in self.ids], dtype=str),
+        }
+
+    def save(self, path: str):
+        with self.lock, _save_lock(path):
+            meta = json.dumps({"backend": self.backend, "dimension": self.dimension})
+            _atomic_savez(path, meta=np.asarray(meta), **self._arrays())
+            self.dirty = False
+
+    @classmethod
+    def from_arrays(cls, data) -> "BruteForceIndex":
+        meta = json.loads(str(data["meta"]))
+        index = cls(meta["dimension"])
+        if len(data["ids"]):
+            index.upsert_many(data["ids"].tolist(), data["vectors"], data["versions"].tolist())
+        index.dirty = False
+        return index
+
+    @classmethod
+    def load(cls, path: str) -> "BruteForceIndex":
+        with np.load(path) as data:
+            return cls.from_arrays(data)
+
+
+class IVFIndex(BruteForceIndex):
+    """Inverted-file index: vectors are bucketed by nearest k-means centroid
+    and a query only scans the `nprobe` closest buckets.
+
+    Small collections (below `min_train_size`) are searched exhaustively.
+    Centroids are retrained when the collection grows or shrinks by 4x;
+    in between, upserts are assigned to their nearest existing centroid.
+    """
+    backend = "ivf"
+
+    def __init__(self, dimension: int, nprobe: int = 8, min_train_size: int = 1024):
+        super().__init__(dimension)
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.centroids: Optional[np.ndarray] = None
+        self.trained_size = 0
+        self.assignments = np.empty(0, dtype=np.int32)
+        self.lists: Optional[List[np.ndarray]] = None
+
+    def _needs_training(self) -> bool:
+        n = len(self.ids)
+        if self.centroids is None:
+            return n >= self.min_train_size
+        return n > 4 * self.trained_size or n < self.trained_size // 4
+
+    def _train(self, iterations: int = 10, seed: int = 0):
+        """Spherical k-means over (a sample of) the stored vectors"""
+        n = len(self.ids)
+        if n < self.min_train_size:
+            self.centroids = None
+            self.trained_size = 0
+            return
+
+        nlist = max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(seed)
+        sample = self.vectors[rng.choice(n, size=min(n, nlist * 64), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = np.bincount(labels, minlength=nlist) == 0
+            sums[empty] = centroids[empty]  # Keep empty clusters where they were
+            centroids = normalize_rows(sums)
+
+        self.centroids = centroids
+        self.trained_size = n
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        assignments = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), 8192):
+            chunk = vectors[start:start + 8192]
+            assignments[start:start + 8192] = np.argmax(chunk @ self.centroids.T, axis=1)
+        return assignments
+
+    def _retrain(self):
+        self._train()
+        self.assignments = self._assign(self.vectors) if self.centroids is not None else np.empty(0, dtype=np.int32)
+        self.lists = None
+
+    def _build_lists(self) -> List[np.ndarray]:
+        """Group matrix rows by centroid (cheap integer sort, done lazily)"""
+        if self.lists is None:
+            order = np.argsort(self.assignments, kind="stable")
+            bounds = np.searchsorted(self.assignments[order], np.arange(len(self.centroids) + 1))
+            self.lists = [order[bounds[c]:bounds[c + 1]] for c in range(len(self.centroids))]
+        return self.lists
+
+    def upsert_many(self, item_ids: List[int], vectors: np.ndarray, versions: List[str]) -> np.ndarray:
+        with self.lock:
+            rows = super().upsert_many(item_ids, vectors, versions)
+            if self._needs_training():
+                self._retrain()
+            elif self.centroids is not None:
+                # Only the written rows need (re)assignment
+                grown = np.zeros(len(self.ids), dtype=np.int32)
+                grown[:len(self.assignments)] = self.assignments
+                grown[rows] = self._assign(self.vectors[rows])
+                self.assignments = grown
+                self.lists = None
+            return rows
+
+    def remove(self, item_id: int) -> Optional[Tuple[int, int]]:
+        with self.lock:
+            swap = super().remove(item_id)
+            if swap is None:
+                return None
+            if self._needs_training():
+                self._retrain()
+            elif self.centroids is not None:
+                position, last = swap
+                self.assignments[position] = self.assignments[last]
+                self.assignments = self.assignments[:last]
+                self.lists = None
+            return swap
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        with self.lock:
+            if self.centroids is None:
+                return super().search(query, k)
+            ids, vectors, centroids = self.ids, self.vectors, self.centroids
+            lists = self._build_lists()
+
+        query = normalize_rows(query)
+        probes = top_k(centroids @ query, self.nprobe)
+        rows = np.concatenate([lists[c] for c in probes])
+        if not len(rows):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        scores = vectors[rows] @ query
+        top = top_k(scores, k)
+        return ids[rows[top]], scores[top]
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        arrays = super()._arrays()
+        if self.centroids is not None:
+            arrays["centroids"] = self.centroids
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, data, nprobe: int = 8) -> "IVFIndex":
+        meta = json.loads(str(data["meta"]))
+        index = cls(meta["dimension"], nprobe=nprobe)
+        if len(data["ids"]):
+            BruteForceIndex.upsert_many(index, data["ids"].tolist(), data["vectors"], data["versions"].tolist())
+        if "centroids" in data:
+            index.centroids = data["centroids"]
+            index.trained_size = len(index.ids)
+            index.assignments = index._assign(index.vectors)
+        elif index._needs_training():
+            index._retrain()
+        index.dirty = False
+        return index
+
+    @classmethod
+    def load(cls, path: str, nprobe: int = 8) -> "IVFIndex":
+        with np.load(path) as data:
+            return cls.from_arrays(data, nprobe=nprobe)
+
+
+class HNSWIndex(VectorIndex):
+    """Graph-based index backed by the optional `hnswlib` package"""
+    backend = "hnsw"
+
+    def __init__(self, dimension: int, max_elements: int = 1024, ef_search: int = 64):
+        if hnswlib is None:
+            raise RuntimeError("hnswlib is not installed")
+        super().__init__(dimension)
+        self.ef_search = ef_search
+        self.graph = hnswlib.Index(space="cosine", dim=dimension)
+        self.graph.init_index(max_elements=max_elements, ef_construction=200, M=16, allow_replace_deleted=True)
+        self.graph.set_ef(ef_search)
+
+    def upsert_many(self, item_ids: List[int], vectors: np.ndarray, versions: List[str]):
+        with self.lock:
+            needed = len(self.versions) + len(item_ids)
+            if needed > self.graph.get_max_elements():
+                self.graph.resize_index(max(needed, 2 * self.graph.get_max_elements()))
+            self.graph.add_items(
+                normalize_rows(np.asarray(vectors).reshape(len(item_ids), -1)),
+                np.asarray(item_ids, dtype=np.int64),
+                replace_deleted=True
+            )
+            for item_id, version in zip(item_ids, versions):
+                self.versions[item_id] = version
+            self.dirty = True
+
+    def remove(self, item_id: int):
+        with self.lock:
+            if self.versions.pop(item_id, None) is not None:
+                self.graph.mark_deleted(item_id)
+                self.dirty = True
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        with self.lock:
+            k = min(k, len(self.versions))
+            if k <= 0:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+            labels, distances = self.graph.knn_query(normalize_rows(query), k=k)
+        return labels[0].astype(np.int64), (1.0 - distances[0]).astype(np.float32)
+
+    def save(self, path: str):
+        with self.lock, _save_lock(path):
+            graph_tmp = _temp_path(f"{path}.hnsw")
+            self.graph.save_index(graph_tmp)
+            os.replace(graph_tmp, f"{path}.hnsw")
+            ids = list(self.versions.keys())
+            meta = json.dumps({"backend": self.backend, "dimension": self.dimension})
+            _atomic_savez(
+                path,
+                meta=np.asarray(meta),
+                ids=np.asarray(ids, dtype=np.int64),
+                versions=np.asarray([self.versions[i] for i in ids], dtype=str)
+            )
+            self.dirty = False
+
+    @classmethod
+    def load(cls, path: str, ef_search: int = 64) -> "HNSWIndex":
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            index = cls(meta["dimension"], ef_search=ef_search)
+            index.graph.load_index(f"{path}.hnsw", allow_replace_deleted=True)
+            index.graph.set_ef(ef_search)
+            index.versions = dict(zip(data["ids"].tolist(), data["versions"].tolist()))
+        return index
+
+
+QUANTIZED_DTYPES = ("float32", "float16", "int8")
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Encode normalized vectors as (codes, per-row scales); scales only for int8"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == "int8":
+        scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+        codes = np.clip(np.round(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    return vectors.astype(np.dtype(dtype)), None
+
+
+def dequantize(codes: np.ndarray, scales: Optional[np.ndarray]) -> np.ndarray:
+    vectors = np.asarray(codes, dtype=np.float32)
+    if scales is not None:
+        vectors = vectors * np.asarray(scales, dtype=np.float32)[:, None]
+    return vectors
+
+
+class MemmapIndex(VectorIndex):
+    """Exact search over a quantized (float16/int8), memory-mapped matrix.
+
+    The saved matrix lives on disk and is paged in by the OS, so a worker
+    can serve millions of profiles with a small resident footprint. Writes
+    since the last save go to a small float32 overlay and shadow the
+    on-disk rows; `save` folds them back into a fresh file.
+
+    The trade-off is latency: numpy has no BLAS kernels for int8/float16,
+    so every query converts each chunk to float32 before scoring it. On
+    20k 384-d vectors that is about 2.5x the float32 scan for int8 and over
+    10x for float16 (the half-precision conversion is slow), so prefer int8
+    and keep brute/ivf/hnsw when memory is not the constraint.
+    """
+    backend = "mmap"
+    chunk_rows = 8192
+
+    def __init__(self, dimension: int, dtype: str = "int8"):
+        if dtype not in QUANTIZED_DTYPES:
+            raise ValueError(f"Unsupported embedding dtype: {dtype}")
+        super().__init__(dimension)
+        self.dtype = dtype
+        self.ids = np.empty(0, dtype=np.int64)
+        self.codes = np.empty((0, dimension), dtype=np.dtype(dtype))
+        self.scales: Optional[np.ndarray] = None
+        self.positions: Dict[int, int] = {}
+        self.shadowed: set = set()  # on-disk rows replaced or removed since the last save
+        self.overlay = BruteForceIndex(dimension)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the on-disk matrix (codes + scales)"""
+        return int(self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0))
+
+    def upsert_many(self, item_ids: List[int], vectors: np.ndarray, versions: List[str]):
+        with self.lock:
+            self.overlay.upsert_many(item_ids, vectors, versions)
+            for item_id, version in zip(item_ids, versions):
+                position = self.positions.get(int(item_id))
+                if position is not None:
+                    self.shadowed.add(position)
+                self.versions[int(item_id)] = version
+            self.dirty = True
+
+    def remove(self, item_id: int):
+        with self.lock:
+            self.overlay.remove(item_id)
+            position = self.positions.get(item_id)
+            if position is not None:
+                self.shadowed.add(position)
+            self.versions.pop(item_id, None)
+            self.dirty = True
+
+    def _search_base(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Chunked scan of the on-disk matrix, keeping a running top-k"""
+        with self.lock:
+            ids, codes, scales = self.ids, self.codes, self.scales
+            shadowed = np.fromiter(self.shadowed, dtype=np.int64) if self.shadowed else None
+
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        # Reuse one float32 buffer per query instead of allocating a copy per chunk
+        buffer = None
+        if codes.dtype != np.float32:
+            buffer = np.empty((min(self.chunk_rows, len(ids)), self.dimension), dtype=np.float32)
+        for start in range(0, len(ids), self.chunk_rows):
+            chunk = codes[start:start + self.chunk_rows]
+            if buffer is not None:
+                np.copyto(buffer[:len(chunk)], chunk, casting="unsafe")
+                chunk = buffer[:len(chunk)]
+            scores = chunk @ query
+            if scales is not None:
+                scores *= scales[start:start + self.chunk_rows]
+            if shadowed is not None:
+                local = shadowed[(shadowed >= start) & (shadowed < start + len(chunk))] - start
+                scores[local] = -np.inf
+            top = top_k(scores, k)
+            best_rows = np.concatenate([best_rows, top + start])
+            best_scores = np.concatenate([best_scores, scores[top]])
+            keep = top_k(best_scores, k)
+            best_rows, best_scores = best_rows[keep], best_scores[keep]
+
+        valid = np.isfinite(best_scores)
+        return ids[best_rows[valid]], best_scores[valid]
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        query = normalize_rows(query)
+        base_ids, base_scores = self._search_base(query, k)
+        overlay_ids, overlay_scores = self.overlay.search(query, k)
+        ids = np.concatenate([base_ids, overlay_ids])
+        scores = np.concatenate([base_scores, overlay_scores]).astype(np.float32)
+        top = top_k(scores, k)
+        return ids[top], scores[top]
+
+    def save(self, path: str):
+        """Write base + overlay into a new quantized file and re-map it"""
+        with self.lock, _save_lock(path):
+            keep = np.ones(len(self.ids), dtype=bool)
+            if self.shadowed:
+                keep[np.fromiter(self.shadowed, dtype=np.int64)] = False
+            kept_rows = np.flatnonzero(keep)
+            total = len(kept_rows) + len(self.overlay.ids)
+
+            codes_path = f"{path}.codes.npy"
+            codes_tmp = _temp_path(codes_path)
+            codes = np.lib.format.open_memmap(
+                codes_tmp, mode="w+", dtype=np.dtype(self.dtype), shape=(total, self.dimension)
+            )
+            scales = np.empty(total, dtype=np.float32) if self.dtype == "int8" else None
+
+            # Copy surviving on-disk rows chunk by chunk, then append the overlay
+            written = 0
+            for start in range(0, len(kept_rows), self.chunk_rows):
+                rows = kept_rows[start:start + self.chunk_rows]
+                codes[written:written + len(rows)] = self.codes[rows]
+                if scales is not None:
+                    scales[written:written + len(rows)] = self.scales[rows]
+                written += len(rows)
+            overlay_codes, overlay_scales = quantize(self.overlay.vectors, self.dtype)
+            codes[written:] = overlay_codes
+            if scales is not None:
+                scales[written:] = overlay_scales
+            codes.flush()
+            del codes
+            os.replace(codes_tmp, codes_path)
+
+            ids = np.concatenate([self.ids[kept_rows], self.overlay.ids])
+            meta = json.dumps({"backend": self.backend, "dimension": self.dimension, "dtype": self.dtype})
+            arrays = {
+                "meta": np.asarray(meta),
+                "ids": ids,
+                "versions": np.asarray([self.versions.get(int(i), "") for i in ids], dtype=str)
+            }
+            if scales is not None:
+                arrays["scales"] = scales
+            _atomic_savez(path, **arrays)
+
+            self._open(path, ids, scales)
+            self.dirty = False
+
+    def _open(self, path: str, ids: np.ndarray, scales: Optional[np.ndarray]):
+        self.codes = np.load(f"{path}.codes.npy", mmap_mode="r")
+        self.ids = ids
+        self.scales = scales
+        self.positions = {int(item_id): row for row, item_id in enumerate(ids)}
+        self.shadowed = set()
+        self.overlay = BruteForceIndex(self.dimension)
+
+    @classmethod
+    def load(cls, path: str) -> "MemmapIndex":
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            index = cls(meta["dimension"], dtype=meta["dtype"])
+            ids = data["ids"]
+            index.versions = dict(zip(ids.tolist(), data["versions"].tolist()))
+            scales = data["scales"] if "scales" in data else None
+        index._open(path, ids, scales)
+        return index
+
+
+INDEX_BACKENDS = {
+    BruteForceIndex.backend: BruteForceIndex,
+    IVFIndex.backend: IVFIndex,
+    HNSWIndex.backend: HNSWIndex,
+    MemmapIndex.backend: MemmapIndex,
+}
+
+
+def create_index(backend: str, dimension: int, nprobe: int = 8, dtype: str = "int8") -> VectorIndex:
+    """Create an empty index, falling back to IVF when hnswlib is missing"""
+    if backend == HNSWIndex.backend and hnswlib is None:
+        print("hnswlib not installed, falling back to IVF index")
+        backend = IVFIndex.backend
+    if backend == IVFIndex.backend:
+        return IVFIndex(dimension, nprobe=nprobe)
+    if backend == HNSWIndex.backend:
+        return HNSWIndex(dimension)
+    if backend == MemmapIndex.backend:
+        return MemmapIndex(dimension, dtype=dtype)
+    return BruteForceIndex(dimension)
+
+
+def load_index(path: str, nprobe: int = 8) -> VectorIndex:
+    """Load a persisted index, whatever backend wrote it"""
+    with np.load(path) as data:
+        backend = json.loads(str(data["meta"]))["backend"]
+    if backend == IVFIndex.backend:
+        return IVFIndex.load(path, nprobe=nprobe)
+    return INDEX_BACKENDS[backend].load(path)
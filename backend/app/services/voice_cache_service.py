@@ -0,0 +1,52 @@
+import json
+import hashlib
+from typing import Dict, Optional
+from sqlalchemy.orm import Session
+from ..models.voice_cache import CachedTranscription, CachedSummary
+from ..utils.upsert import upsert
+
+
+class VoiceCacheService:
+    """Content-addressed database cache for transcripts and summaries, so duplicate uploads skip the provider"""
+    
+    @staticmethod
+    def _hash(*parts: str) -> str:
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def transcription_key(audio_sha256: str, transcriber: str) -> str:
+        """Key for an audio file's transcript from a given transcriber/model"""
+        return VoiceCacheService._hash(transcriber, audio_sha256)
+    
+    @staticmethod
+    def summary_key(transcription: str, prompt_version: int, model: str) -> str:
+        """Key for a transcript's summary under a given prompt version and model"""
+        return VoiceCacheService._hash(f"v{prompt_version}", model, transcription)
+    
+    @staticmethod
+    def get_transcription(db: Session, key: str) -> Optional[str]:
+        """Cached transcript, or None"""
+        cached = db.query(CachedTranscription).filter(CachedTranscription.cache_key == key).first()
+        return cached.transcription if cached else None
+    
+    @staticmethod
+    def put_transcription(db: Session, key: str, transcription: str):
+        """Store a transcript (caller commits); an upsert, since workers processing the same file race here"""
+        upsert(db, CachedTranscription, [{"cache_key": key, "transcription": transcription}], ["cache_key"])
+    
+    @staticmethod
+    def get_summary(db: Session, key: str) -> Optional[Dict]:
+        """Cached {"summary", "key_points"}, or None"""
+        cached = db.query(CachedSummary).filter(CachedSummary.cache_key == key).first()
+        if not cached:
+            return None
+        return {"summary": cached.summary, "key_points": json.loads(cached.key_points)}
+    
+    @staticmethod
+    def put_summary(db: Session, key: str, summary_data: Dict):
+        """Store a summary (caller commits); an upsert, like put_transcription"""
+        upsert(db, CachedSummary, [{
+            "cache_key": key,
+            "summary": summary_data.get("summary", ""),
+            "key_points": json.dumps(summary_data.get("key_points", []))
+        }], ["cache_key"])
@@ -0,0 +1,194 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..database import SessionLocal
+from ..models.voice_note import VoiceNote
+from ..models.voice_note_job import VoiceNoteJob
+
+
+class VoiceJobService:
+    """Database-backed job queue for voice note processing, drained by a local thread pool.
+    
+    Jobs are claimed with a conditional UPDATE, so several app processes can
+    share the same table without double-processing a note.
+    """
+    
+    _stop_event = threading.Event()
+    _wake_event = threading.Event()
+    _threads: List[threading.Thread] = []
+    
+    @staticmethod
+    def enqueue(db: Session, voice_note_id: int, max_attempts: int = None) -> VoiceNoteJob:
+        """Queue a voice note for processing (caller commits, then calls `notify`)"""
+        job = VoiceNoteJob(
+            voice_note_id=voice_note_id,
+            status="queued",
+            attempts=0,
+            max_attempts=max_attempts or settings.VOICE_JOB_MAX_ATTEMPTS,
+            run_after=datetime.utcnow()
+        )
+        db.add(job)
+        db.flush()
+        return job
+    
+    @staticmethod
+    def notify():
+        """Wake idle workers in this process instead of waiting for the next poll"""
+        VoiceJobService._wake_event.set()
+    
+    @staticmethod
+    def retry_delay(attempts: int) -> int:
+        """Exponential backoff in seconds after `attempts` failed runs"""
+        delay = settings.VOICE_JOB_RETRY_SECONDS * 2 ** max(attempts - 1, 0)
+        return min(delay, settings.VOICE_JOB_RETRY_MAX_SECONDS)
+    
+    @staticmethod
+    def claim_next(db: Session, worker: str) -> Optional[VoiceNoteJob]:
+        """Atomically claim the next due job, or return None if the queue is empty"""
+        for _ in range(5):
+            job_id = db.query(VoiceNoteJob.id).filter(
+                VoiceNoteJob.status == "queued",
+                VoiceNoteJob.run_after <= datetime.utcnow()
+            ).order_by(VoiceNoteJob.run_after, VoiceNoteJob.id).limit(1).scalar()
+            if job_id is None:
+                return None
+            
+            # Only one worker wins the queued -> running transition
+            claimed = db.query(VoiceNoteJob).filter(
+                VoiceNoteJob.id == job_id,
+                VoiceNoteJob.status == "queued"
+            ).update({
+                VoiceNoteJob.status: "running",
+                VoiceNoteJob.attempts: VoiceNoteJob.attempts + 1,
+                VoiceNoteJob.worker: worker,
+                VoiceNoteJob.started_at: datetime.utcnow()
+            }, synchronize_session=False)
+            db.commit()
+            
+            if claimed:
+                return db.query(VoiceNoteJob).filter(VoiceNoteJob.id == job_id).first()
+        return None
+    
+    @staticmethod
+    def run_job(db: Session, job: VoiceNoteJob):
+        """Process a claimed job, scheduling a retry with backoff if it fails"""
+        from .voice_note_service import VoiceNoteService
+        
+        voice_note = db.query(VoiceNote).filter(VoiceNote.id == job.voice_note_id).first()
+        if not voice_note:
+            job.status = "failed"
+            job.last_error = "Voice note no longer exists"
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            return
+        
+        voice_note.status = "processing"
+        db.commit()
+        
+        try:
+            VoiceNoteService.process_voice_note(db, voice_note)
+            job.status = "succeeded"
+            job.last_error = None
+            job.finished_at = datetime.utcnow()
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Voice note job {job.id} failed (attempt {job.attempts}/{job.max_attempts}): {e}")
+            
+            job.last_error = str(e)
+            if job.attempts < job.max_attempts:
+                job.status = "queued"
+                job.run_after = datetime.utcnow() + timedelta(seconds=VoiceJobService.retry_delay(job.attempts))
+                voice_note.status = "pending"
+            else:
+                job.status = "failed"
+                job.finished_at = datetime.utcnow()
+                voice_note.status = "failed"
+                voice_note.summary = f"Processing error: {str(e)}"
+            db.commit()
+    
+    @staticmethod
+    def requeue_stale(db: Session) -> int:
+        """Return running jobs whose worker died (e.g. a restart mid-job) to the queue"""
+        cutoff = datetime.utcnow() - timedelta(minutes=settings.VOICE_JOB_STALE_MINUTES)
+        count = db.query(VoiceNoteJob).filter(
+            VoiceNoteJob.status == "running",
+            VoiceNoteJob.started_at < cutoff
+        ).update({
+            VoiceNoteJob.status: "queued",
+            VoiceNoteJob.run_after: datetime.utcnow()
+        }, synchronize_session=False)
+        db.commit()
+        return count
+    
+    @staticmethod
+    def get_status(db: Session, job_id: int) -> Optional[Dict]:
+        """Get a job's state together with its voice note's status"""
+        job = db.query(VoiceNoteJob).filter(VoiceNoteJob.id == job_id).first()
+        if not job:
+            return None
+        
+        voice_note = db.query(VoiceNote).filter(VoiceNote.id == job.voice_note_id).first()
+        return {
+            "job_id": job.id,
+            "voice_note_id": job.voice_note_id,
+            "status": job.status,
+            "note_status": voice_note.status if voice_note else None,
+            "attempts": job.attempts,
+            "max_attempts": job.max_attempts,
+            "last_error": job.last_error,
+            "run_after": job.run_after.isoformat() if job.run_after else None,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None
+        }
+    
+    @staticmethod
+    def work(worker: str):
+        """Worker loop: drain due jobs, then sleep until notified or the next poll"""
+        stop_event = VoiceJobService._stop_event
+        while not stop_event.is_set():
+            db = SessionLocal()
+            try:
+                job = VoiceJobService.claim_next(db, worker)
+                if job is not None:
+                    VoiceJobService.run_job(db, job)
+                    continue
+            except Exception as e:
+                print(f"Voice job worker error: {e}")
+            finally:
+                db.close()
+            
+            VoiceJobService._wake_event.wait(settings.VOICE_JOB_POLL_SECONDS)
+            VoiceJobService._wake_event.clear()
+    
+    @staticmethod
+    def start_workers(count: int):
+        """Start `count` daemon worker threads"""
+        if VoiceJobService._threads:
+            return
+        
+        db = SessionLocal()
+        try:
+            requeued = VoiceJobService.requeue_stale(db)
+            if requeued:
+                print(f"Requeued {requeued} stale voice note jobs")
+        finally:
+            db.close()
+        
+        VoiceJobService._stop_event.clear()
+        for i in range(count):
+            name = f"voice-worker-{i}"
+            thread = threading.Thread(target=VoiceJobService.work, args=(f"{os.getpid()}:{name}",), name=name, daemon=True)
+            thread.start()
+            VoiceJobService._threads.append(thread)
+    
+    @staticmethod
+    def stop_workers():
+        """Stop the worker threads (jobs in progress finish; unfinished ones are requeued on restart)"""
+        VoiceJobService._stop_event.set()
+        VoiceJobService._wake_event.set()
+        VoiceJobService._threads = []
@@ -1,13 +1,25 @@
 import os
 import json
 from datetime import datetime
-from typing import List, Dict
-from sqlalchemy.orm import Session
-from groq import Groq
-from ..models.voice_note import VoiceNote
-from ..config import settings
+from typing import List, Dict, Optional, Tuple
+from sqlalchemy.orm import Session, load_only
+from ..models.voice_note import VoiceNote, voice_note_search
+from ..models.voice_note_job import VoiceNoteJob
+from ..models.voice_note_section import VoiceNoteSection
+from .voice_job_service import VoiceJobService
+from .transcription_service import TranscriptionService, get_transcriber
+from .audio_service import AudioService
+from .voice_cache_service import VoiceCacheService
+from .voice_search_service import VoiceSearchService
+from .summary_service import SummaryService, SUMMARY_MODEL, SUMMARY_PROMPT_VERSION, groq_client
+from ..utils.pagination import encode_cursor, decode_cursor, keyset_after
 
-groq_client = Groq(api_key=settings.GROQ_API_KEY) if settings.GROQ_API_KEY else None
+# Columns sent in library listings; the transcription is only loaded by the detail endpoint
+LIST_COLUMNS = (
+    VoiceNote.id, VoiceNote.user_id, VoiceNote.filename, VoiceNote.duration, VoiceNote.summary,
+    VoiceNote.key_points, VoiceNote.status, VoiceNote.subject, VoiceNote.tags,
+    VoiceNote.created_at, VoiceNote.processed_at
+)
 
 UPLOAD_DIR = "uploads/voice_notes"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
@@ -15,131 +27,238 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 class VoiceNoteService:
     @staticmethod
-    async def transcribe_audio(file_path: str) -> str:
-        """Transcribe audio file using Groq Whisper"""
-        try:
-            if not groq_client:
-                return "Transcription unavailable - API key not configured"
-            
-            with open(file_path, "rb") as audio_file:
-                transcript = groq_client.audio.transcriptions.create(
-                    model="whisper-large-v3",
-                    file=audio_file,
-                    response_format="text"
-                )
-            return transcript
-        except Exception as e:
-            print(f"Transcription error: {e}")
-            return f"Transcription failed: {str(e)}"
+    def summary_cache_key(transcription: str) -> str:
+        return VoiceCacheService.summary_key(transcription, SUMMARY_PROMPT_VERSION, SUMMARY_MODEL)
     
     @staticmethod
-    def generate_summary(transcription: str) -> Dict[str, any]:
-        """Generate summary and key points from transcription using Groq"""
+    def transcribe_voice_note(db: Session, voice_note: VoiceNote) -> str:
+        """Transcribe a note's audio, reusing the cached transcript of identical audio"""
+        transcriber = get_transcriber()
+        key = None
+        if voice_note.audio_sha256:
+            key = VoiceCacheService.transcription_key(voice_note.audio_sha256, transcriber.cache_name)
+            cached = VoiceCacheService.get_transcription(db, key)
+            if cached is not None:
+                return cached
+        
+        transcription = TranscriptionService.transcribe(voice_note.file_path, transcriber)
+        if key and transcriber.available:
+            VoiceCacheService.put_transcription(db, key, transcription)
+            # Keep the transcript even if summarizing fails and the job is retried
+            db.commit()
+        return transcription
+    
+    @staticmethod
+    def summarize(db: Session, transcription: str, voice_note: VoiceNote = None) -> Dict[str, any]:
+        """Summarize a transcript, reusing the cached summary of an identical transcript
+        and any stored section summaries; the note's section summaries are stored for reuse"""
+        key = VoiceNoteService.summary_cache_key(transcription)
+        cached = VoiceCacheService.get_summary(db, key)
+        if cached is not None:
+            return cached
+        
+        hashes = [SummaryService.section_hash(section) for section in SummaryService.split_sections(transcription)]
+        known = {}
+        if len(hashes) > 1:
+            known = dict(db.query(VoiceNoteSection.content_hash, VoiceNoteSection.summary).filter(
+                VoiceNoteSection.content_hash.in_(hashes)
+            ).all())
+        
+        summary_data, sections = SummaryService.summarize(transcription, known)
+        if groq_client:
+            VoiceCacheService.put_summary(db, key, summary_data)
+        
+        if voice_note is not None and sections:
+            db.query(VoiceNoteSection).filter(VoiceNoteSection.voice_note_id == voice_note.id).delete(synchronize_session=False)
+            db.add_all([
+                VoiceNoteSection(voice_note_id=voice_note.id, section_index=i, content_hash=content_hash, summary=summary)
+                for i, (content_hash, summary) in enumerate(sections)
+            ])
+        return summary_data
+    
+    @staticmethod
+    def answer_question(db: Session, voice_note: VoiceNote, question: str) -> str:
+        """Answer a follow-up question from the note's section summaries (or its transcript, if short)"""
+        transcription = voice_note.transcription or ""
+        sections = SummaryService.split_sections(transcription)
+        
+        if len(sections) <= 1:
+            context = transcription or voice_note.summary or ""
+        else:
+            # Section summaries are content-addressed, so re-uploads share them too
+            hashes = [SummaryService.section_hash(section) for section in sections]
+            stored = dict(db.query(VoiceNoteSection.content_hash, VoiceNoteSection.summary).filter(
+                VoiceNoteSection.content_hash.in_(hashes)
+            ).all())
+            if all(content_hash in stored for content_hash in hashes):
+                context = "\n\n".join(stored[content_hash] for content_hash in hashes)
+            else:
+                context = voice_note.summary or ""
+        
         try:
-            if not groq_client:
-                return {
-                    "summary": "AI summarization unavailable - API key not configured",
-                    "key_points": []
-                }
-            
-            prompt = f"""Analyze this study note transcription and provide:
-1. A concise summary (2-3 sentences)
-2. Key points (bullet list, 3-5 main points)
-
-Transcription:
-{transcription}
-
-Format your response as JSON:
-{{
-    "summary": "...",
-    "key_points": ["point 1", "point 2", ...]
-}}
-"""
-            
-            response = groq_client.chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=[
-                    {"role": "system", "content": "You are a helpful study assistant that summarizes lecture notes. Always respond with valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=500,
-                temperature=0.5
-            )
-            
-            content = response.choices[0].message.content.strip()
-            # Extract JSON from response
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0].strip()
-            
-            result = json.loads(content)
-            return result
+            return SummaryService.answer_question(context, question)
         except Exception as e:
-            print(f"Summary generation error: {e}")
-            return {
-                "summary": f"Summary generation failed: {str(e)}",
-                "key_points": []
-            }
+            print(f"Question answering error: {e}")
+            return f"Could not answer the question: {str(e)}"
+    
+    @staticmethod
+    def cached_result(db: Session, audio_sha256: str) -> Optional[Tuple[str, Dict]]:
+        """(transcription, summary) for audio that was already processed, if both are cached"""
+        if not audio_sha256:
+            return None
+        
+        key = VoiceCacheService.transcription_key(audio_sha256, get_transcriber().cache_name)
+        transcription = VoiceCacheService.get_transcription(db, key)
+        if transcription is None:
+            return None
+        
+        summary_data = VoiceCacheService.get_summary(db, VoiceNoteService.summary_cache_key(transcription))
+        if summary_data is None:
+            return None
+        return transcription, summary_data
     
     @staticmethod
-    async def process_voice_note(
+    def complete_voice_note(voice_note: VoiceNote, transcription: str, summary_data: Dict):
+        """Store processing results on a note and mark it completed"""
+        voice_note.transcription = transcription
+        voice_note.summary = summary_data.get("summary", "")
+        voice_note.key_points = json.dumps(summary_data.get("key_points", []))
+        voice_note.status = "completed"
+        voice_note.processed_at = datetime.utcnow()
+    
+    @staticmethod
+    def create_voice_note(
         db: Session, 
         user_id: int, 
         file_path: str, 
         filename: str,
         subject: str = None,
-        tags: List[str] = None
-    ) -> VoiceNote:
-        """Process uploaded voice note: transcribe and summarize"""
-        # Create database entry
+        tags: List[str] = None,
+        audio_sha256: str = None
+    ) -> Tuple[VoiceNote, Optional[VoiceNoteJob]]:
+        """Store an uploaded voice note and queue it for processing.
+        
+        Audio that was already transcribed and summarized completes immediately, with no job.
+        """
         voice_note = VoiceNote(
             user_id=user_id,
             filename=filename,
             file_path=file_path,
+            audio_sha256=audio_sha256,
             subject=subject,
-            tags=json.dumps(tags or [])
+            tags=json.dumps(tags or []),
+            status="pending"
         )
         db.add(voice_note)
+        db.flush()
+        
+        cached = VoiceNoteService.cached_result(db, audio_sha256)
+        if cached:
+            # Passages for semantic search are indexed lazily on the next search.
+            # The audio isn't re-encoded on this path (to keep the response immediate),
+            # but its sizes and duration are still recorded.
+            VoiceNoteService.complete_voice_note(voice_note, *cached)
+            VoiceNoteService.ingest_audio(db, voice_note, reencode=False)
+            db.refresh(voice_note)
+            return voice_note, None
+        
+        job = VoiceJobService.enqueue(db, voice_note.id)
         db.commit()
+        db.refresh(voice_note)
+        VoiceJobService.notify()
         
+        return voice_note, job
+    
+    @staticmethod
+    def ingest_audio(db: Session, voice_note: VoiceNote, reencode: bool = True) -> VoiceNote:
+        """Downmix/resample/re-encode the uploaded audio (unless `reencode` is False)
+        and record its duration and sizes"""
+        audio = AudioService.normalize(voice_note.file_path) if reencode else AudioService.original(voice_note.file_path)
+        voice_note.file_path = audio.path
+        voice_note.original_size = audio.original_size
+        voice_note.stored_size = audio.size
+        if audio.duration is not None:
+            voice_note.duration = audio.duration
+        # Commit now so a retried job doesn't look for the replaced original
+        db.commit()
+        return voice_note
+    
+    @staticmethod
+    def process_voice_note(db: Session, voice_note: VoiceNote) -> VoiceNote:
+        """Normalize, transcribe and summarize a voice note (run by the job workers; caller commits)"""
+        if voice_note.original_size is None:
+            VoiceNoteService.ingest_audio(db, voice_note)
+        
+        transcription = VoiceNoteService.transcribe_voice_note(db, voice_note)
+        summary_data = VoiceNoteService.summarize(db, transcription, voice_note)
+        VoiceNoteService.complete_voice_note(voice_note, transcription, summary_data)
+        
+        # Embed transcript passages for semantic search; a failure here shouldn't fail the job
         try:
-            # Transcribe
-            transcription = await VoiceNoteService.transcribe_audio(file_path)
-            voice_note.transcription = transcription
-            
-            # Generate summary
-            summary_data = VoiceNoteService.generate_summary(transcription)
-            voice_note.summary = summary_data.get("summary", "")
-            voice_note.key_points = json.dumps(summary_data.get("key_points", []))
-            voice_note.processed_at = datetime.utcnow()
-            
-            db.commit()
-            db.refresh(voice_note)
+            VoiceSearchService.index_voice_note(db, voice_note)
         except Exception as e:
-            print(f"Processing error: {e}")
-            voice_note.summary = f"Processing error: {str(e)}"
-            db.commit()
-        
+            print(f"Voice note indexing error: {e}")
         return voice_note
     
     @staticmethod
-    def search_voice_notes(
-        db: Session, 
-        user_id: int, 
-        query: str = None,
-        subject: str = None
-    ) -> List[VoiceNote]:
-        """Search voice notes by query or subject"""
-        notes_query = db.query(VoiceNote).filter(VoiceNote.user_id == user_id)
+    def full_text_search(
+        db: Session,
+        user_id: int,
+        query: str,
+        subject: str = None,
+        limit: int = 50
+    ) -> List[Tuple[VoiceNote, float, Optional[str]]]:
+        """Ranked full-text search over a user's notes, with highlighted snippets"""
+        where = "t.user_id = :user_id"
+        params = {"user_id": user_id}
+        if subject:
+            where += " AND t.subject = :subject"
+            params["subject"] = subject
+        
+        hits = voice_note_search.search(db, query, where=where, params=params, limit=limit)
+        if hits is None:
+            # No full-text index on this database; fall back to substring matching
+            notes = db.query(VoiceNote).filter(
+                VoiceNote.user_id == user_id,
+                (VoiceNote.transcription.contains(query)) | (VoiceNote.summary.contains(query))
+            )
+            if subject:
+                notes = notes.filter(VoiceNote.subject == subject)
+            return [(note, 0.0, None) for note in notes.order_by(VoiceNote.created_at.desc()).limit(limit)]
+        
+        notes = {
+            note.id: note
+            for note in db.query(VoiceNote).options(load_only(*LIST_COLUMNS)).filter(
+                VoiceNote.id.in_([hit.id for hit in hits])
+            )
+        }
+        return [(notes[hit.id], hit.score, hit.snippet) for hit in hits if hit.id in notes]
+    
+    @staticmethod
+    def list_voice_notes(
+        db: Session,
+        user_id: int,
+        subject: str = None,
+        cursor: str = None,
+        limit: int = 50
+    ) -> Tuple[List[VoiceNote], Optional[str]]:
+        """One page of a user's library, newest first, without transcriptions.
+        
+        Returns the notes and the cursor for the next page (None on the last page).
+        """
+        notes_query = db.query(VoiceNote).options(load_only(*LIST_COLUMNS)).filter(VoiceNote.user_id == user_id)
         
         if subject:
             notes_query = notes_query.filter(VoiceNote.subject == subject)
         
-        if query:
-            notes_query = notes_query.filter(
-                (VoiceNote.transcription.contains(query)) |
-                (VoiceNote.summary.contains(query))
-            )
+        order = (VoiceNote.created_at, VoiceNote.id)
+        if cursor:
+            notes_query = notes_query.filter(keyset_after(order, decode_cursor(cursor, len(order)), dialect=db.bind.dialect.name))
+        
+        notes = notes_query.order_by(VoiceNote.created_at.desc(), VoiceNote.id.desc()).limit(limit + 1).all()
         
-        return notes_query.order_by(VoiceNote.created_at.desc()).all()
+        next_cursor = None
+        if len(notes) > limit:
+            notes = notes[:limit]
+            next_cursor = encode_cursor([notes[-1].created_at, notes[-1].id])
+        return notes, next_cursor
@@ -0,0 +1,161 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+import numpy as np
+from ..models.voice_note import VoiceNote
+from ..models.voice_note_chunk import VoiceNoteChunk
+from ..config import settings
+from .embedding_service import EmbeddingService
+from .vector_index import BruteForceIndex
+
+# user_id -> ((chunk count, max chunk id), index over that user's chunks)
+_user_indexes: "OrderedDict[int, Tuple[Tuple[int, int], BruteForceIndex]]" = OrderedDict()
+_user_indexes_lock = threading.Lock()
+
+
+class VoiceSearchService:
+    @staticmethod
+    def chunk_transcript(
+        transcription: str,
+        duration: Optional[float] = None,
+        chunk_words: int = None,
+        overlap_words: int = None
+    ) -> List[Tuple[str, Optional[float], Optional[float]]]:
+        """Split a transcript into overlapping passages of (text, start_seconds, end_seconds).
+        
+        Timestamps are estimated from word position, assuming a steady speaking rate.
+        """
+        chunk_words = chunk_words or settings.VOICE_SEARCH_CHUNK_WORDS
+        overlap_words = min(overlap_words if overlap_words is not None else settings.VOICE_SEARCH_CHUNK_OVERLAP_WORDS, chunk_words - 1)
+        words = (transcription or "").split()
+        if not words:
+            return []
+        
+        seconds_per_word = duration / len(words) if duration else None
+        chunks = []
+        start = 0
+        while start < len(words):
+            end = min(start + chunk_words, len(words))
+            text = " ".join(words[start:end])
+            if seconds_per_word:
+                chunks.append((text, round(start * seconds_per_word, 1), round(end * seconds_per_word, 1)))
+            else:
+                chunks.append((text, None, None))
+            if end == len(words):
+                break
+            start = end - overlap_words
+        return chunks
+    
+    @staticmethod
+    def index_voice_note(db: Session, voice_note: VoiceNote) -> int:
+        """Replace a note's embedded passages with ones from its current transcript (caller commits)"""
+        chunks = VoiceSearchService.chunk_transcript(voice_note.transcription, voice_note.duration)
+        embeddings = EmbeddingService.encode([text for text, _, _ in chunks]) if chunks else []
+        
+        db.query(VoiceNoteChunk).filter(VoiceNoteChunk.voice_note_id == voice_note.id).delete(synchronize_session=False)
+        db.add_all([
+            VoiceNoteChunk(
+                voice_note_id=voice_note.id,
+                user_id=voice_note.user_id,
+                chunk_index=i,
+                text=text,
+                start_seconds=start,
+                end_seconds=end,
+                embedding=np.asarray(embedding, dtype=np.float32).tobytes()
+            )
+            for i, ((text, start, end), embedding) in enumerate(zip(chunks, embeddings))
+        ])
+        return len(chunks)
+    
+    @staticmethod
+    def index_missing(db: Session, user_id: int) -> int:
+        """Index a user's processed notes that have no passages yet (older notes, failed indexing)"""
+        indexed = db.query(VoiceNoteChunk.voice_note_id).filter(VoiceNoteChunk.user_id == user_id)
+        notes = db.query(VoiceNote).filter(
+            VoiceNote.user_id == user_id,
+            VoiceNote.status == "completed",
+            VoiceNote.transcription.isnot(None),
+            VoiceNote.id.notin_(indexed)
+        ).all()
+        
+        for note in notes:
+            VoiceSearchService.index_voice_note(db, note)
+        if notes:
+            db.commit()
+        return len(notes)
+    
+    @staticmethod
+    def get_user_index(db: Session, user_id: int) -> BruteForceIndex:
+        """Per-user passage index, rebuilt from the table when its chunks change"""
+        signature = tuple(db.query(func.count(VoiceNoteChunk.id), func.max(VoiceNoteChunk.id)).filter(
+            VoiceNoteChunk.user_id == user_id
+        ).one())
+        
+        with _user_indexes_lock:
+            cached = _user_indexes.get(user_id)
+            if cached and cached[0] == signature:
+                _user_indexes.move_to_end(user_id)
+                return cached[1]
+        
+        rows = db.query(VoiceNoteChunk.id, VoiceNoteChunk.embedding).filter(VoiceNoteChunk.user_id == user_id).all()
+        if rows:
+            vectors = np.vstack([np.frombuffer(embedding, dtype=np.float32) for _, embedding in rows])
+            index = BruteForceIndex(vectors.shape[1])
+            index.upsert_many([chunk_id for chunk_id, _ in rows], vectors, [""] * len(rows))
+        else:
+            index = BruteForceIndex(0)
+        
+        with _user_indexes_lock:
+            _user_indexes[user_id] = (signature, index)
+            _user_indexes.move_to_end(user_id)
+            while len(_user_indexes) > settings.VOICE_SEARCH_CACHE_USERS:
+                _user_indexes.popitem(last=False)
+        return index
+    
+    @staticmethod
+    def semantic_search(
+        db: Session,
+        user_id: int,
+        query: str,
+        limit: int = 10,
+        subject: str = None
+    ) -> List[Dict]:
+        """Best-matching transcript passages for a query, by embedding similarity"""
+        VoiceSearchService.index_missing(db, user_id)
+        index = VoiceSearchService.get_user_index(db, user_id)
+        if not len(index):
+            return []
+        
+        # Over-fetch when filtering by subject, since filtering happens after the search
+        k = limit * 4 if subject else limit
+        chunk_ids, scores = index.search(EmbeddingService.encode(query), k)
+        if not len(chunk_ids):
+            return []
+        
+        rows = db.query(VoiceNoteChunk, VoiceNote).join(
+            VoiceNote, VoiceNote.id == VoiceNoteChunk.voice_note_id
+        ).filter(VoiceNoteChunk.id.in_([int(chunk_id) for chunk_id in chunk_ids])).all()
+        by_id = {chunk.id: (chunk, note) for chunk, note in rows}
+        
+        results = []
+        for chunk_id, score in zip(chunk_ids, scores):
+            if int(chunk_id) not in by_id:
+                continue
+            chunk, note = by_id[int(chunk_id)]
+            if subject and note.subject != subject:
+                continue
+            results.append({
+                "voice_note_id": note.id,
+                "filename": note.filename,
+                "subject": note.subject,
+                "chunk_index": chunk.chunk_index,
+                "text": chunk.text,
+                "start_seconds": chunk.start_seconds,
+                "end_seconds": chunk.end_seconds,
+                "score": round(float(score), 4)
+            })
+            if len(results) >= limit:
+                break
+        return results
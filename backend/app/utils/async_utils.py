@@ -0,0 +1,19 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Coroutine
+
+
+def run_async(coro: Coroutine) -> Any:
+    """Run a coroutine to completion from synchronous code.
+
+    Sync endpoints run in FastAPI's threadpool, where no event loop is
+    running, so `asyncio.run` is enough. If we are somehow already inside
+    a running loop, the coroutine is run on a helper thread instead.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
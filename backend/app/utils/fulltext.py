@@ -0,0 +1,193 @@
+import re
+from typing import Dict, List, NamedTuple, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+# Column weights use Postgres setweight letters; SQLite bm25() gets the matching multiplier
+BM25_WEIGHTS = {"A": 4.0, "B": 2.0, "C": 1.0, "D": 0.5}
+
+SNIPPET_START = "<mark>"
+SNIPPET_END = "</mark>"
+
+FULLTEXT_INDEXES: List["FullTextIndex"] = []
+
+
+class SearchHit(NamedTuple):
+    id: int
+    score: float  # higher is better
+    snippet: Optional[str]
+
+
+def query_terms(query: str) -> List[str]:
+    """Split a user query into plain word terms (drops FTS operators and punctuation)"""
+    return re.findall(r"\w+", query.lower())
+
+
+class FullTextIndex:
+    """Full-text index over text columns of a table.
+    
+    SQLite: an external-content FTS5 table kept in sync by triggers.
+    Postgres: a stored, generated tsvector column with a GIN index.
+    Both are maintained by the database on every write, whatever code path makes it.
+    
+    The main index is stemmed, so a typed prefix like "operat" would only match
+    if it happened to be a stem. With `prefix_index`, a second unstemmed index
+    (FTS5 `unicode61` / the `simple` config) answers prefix (type-ahead) queries.
+    """
+    
+    def __init__(
+        self,
+        table: str,
+        columns: Dict[str, str],
+        snippet_columns: List[str] = None,
+        key: str = "id",
+        prefix_index: bool = False
+    ):
+        self.table = table
+        self.columns = columns  # column name -> weight letter A-D
+        self.snippet_columns = snippet_columns or list(columns)
+        self.key = key
+        self.prefix_index = prefix_index
+        self.fts_table = f"{table}_fts"
+        self.prefix_fts_table = f"{table}_fts_prefix"
+        self.vector_column = "search_vector"
+        self.prefix_vector_column = "search_vector_prefix"
+        self.dialect: Optional[str] = None  # set by ensure(); None means unavailable
+        FULLTEXT_INDEXES.append(self)
+    
+    def ensure(self, engine: Engine):
+        """Create the index, triggers and initial contents if they don't exist yet"""
+        dialect = engine.dialect.name
+        try:
+            with engine.begin() as connection:
+                if dialect == "sqlite":
+                    self._ensure_sqlite(connection)
+                elif dialect == "postgresql":
+                    self._ensure_postgres(connection)
+                else:
+                    return
+            self.dialect = dialect
+        except Exception as e:
+            print(f"Full-text index for {self.table} unavailable: {e}")
+    
+    def _ensure_sqlite(self, connection):
+        self._ensure_sqlite_table(connection, self.fts_table, "tokenize='porter unicode61'")
+        if self.prefix_index:
+            self._ensure_sqlite_table(connection, self.prefix_fts_table, "tokenize='unicode61', prefix='2 3'")
+    
+    def _ensure_sqlite_table(self, connection, fts: str, options: str):
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": fts}
+        ).first()
+        if exists:
+            return
+        
+        columns = ", ".join(self.columns)
+        new_values = ", ".join(f"new.{column}" for column in self.columns)
+        old_values = ", ".join(f"old.{column}" for column in self.columns)
+        
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({columns}, content='{self.table}', "
+            f"content_rowid='{self.key}', {options})"
+        ))
+        connection.execute(text(
+            f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {self.table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.{self.key}, {new_values}); END"
+        ))
+        connection.execute(text(
+            f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {self.table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.{self.key}, {old_values}); END"
+        ))
+        # Only re-index when an indexed column changes
+        connection.execute(text(
+            f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {columns} ON {self.table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.{self.key}, {old_values}); "
+            f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.{self.key}, {new_values}); END"
+        ))
+        connection.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+    
+    def _ensure_postgres(self, connection):
+        self._ensure_postgres_column(connection, self.vector_column, "english")
+        if self.prefix_index:
+            self._ensure_postgres_column(connection, self.prefix_vector_column, "simple")
+    
+    def _ensure_postgres_column(self, connection, column_name: str, config: str):
+        vector = " || ".join(
+            f"setweight(to_tsvector('{config}', coalesce({column}, '')), '{weight}')"
+            for column, weight in self.columns.items()
+        )
+        connection.execute(text(
+            f"ALTER TABLE {self.table} ADD COLUMN IF NOT EXISTS {column_name} tsvector "
+            f"GENERATED ALWAYS AS ({vector}) STORED"
+        ))
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{self.table}_{column_name} "
+            f"ON {self.table} USING GIN ({column_name})"
+        ))
+    
+    def search(
+        self,
+        db: Session,
+        query: str,
+        where: str = None,
+        params: Dict = None,
+        limit: int = 20,
+        offset: int = 0,
+        prefix: bool = False
+    ) -> Optional[List[SearchHit]]:
+        """Ranked matches for `query`, best first.
+        
+        `where` is an extra SQL condition on the base table, aliased `t`.
+        With `prefix`, every term also matches words starting with it (type-ahead);
+        this uses the unstemmed index when the table has one.
+        Returns None when no full-text index is available, so callers can fall back.
+        """
+        if self.dialect is None:
+            return None
+        
+        terms = query_terms(query)
+        if not terms:
+            return []
+        
+        params = dict(params or {}, limit=limit, offset=offset)
+        extra = f" AND ({where})" if where else ""
+        
+        unstemmed = prefix and self.prefix_index
+        
+        if self.dialect == "sqlite":
+            fts = self.prefix_fts_table if unstemmed else self.fts_table
+            params["query"] = " ".join(f'"{term}"' + ("*" if prefix else "") for term in terms)
+            weights = ", ".join(str(BM25_WEIGHTS[weight]) for weight in self.columns.values())
+            sql = (
+                f"SELECT t.{self.key}, bm25({fts}, {weights}) AS rank, "
+                f"snippet({fts}, -1, '{SNIPPET_START}', '{SNIPPET_END}', '…', 16) "
+                f"FROM {fts} JOIN {self.table} t ON t.{self.key} = {fts}.rowid "
+                f"WHERE {fts} MATCH :query{extra} "
+                f"ORDER BY rank LIMIT :limit OFFSET :offset"
+            )
+            rows = db.execute(text(sql), params).fetchall()
+            return [SearchHit(row[0], -row[1], row[2]) for row in rows]
+        
+        config, vector_column = ("simple", self.prefix_vector_column) if unstemmed else ("english", self.vector_column)
+        params["query"] = " & ".join(term + (":*" if prefix else "") for term in terms)
+        document = ", ".join(self.snippet_columns)
+        # Rank and limit first, so the headline is only built for returned rows
+        sql = (
+            f"SELECT hits.{self.key}, hits.score, ts_headline('{config}', concat_ws(' … ', {document}), hits.q, "
+            f"'StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, MaxWords=24, MinWords=8, MaxFragments=2') "
+            f"FROM (SELECT t.*, q, ts_rank_cd(t.{vector_column}, q) AS score "
+            f"FROM {self.table} t, to_tsquery('{config}', :query) q "
+            f"WHERE t.{vector_column} @@ q{extra} "
+            f"ORDER BY score DESC LIMIT :limit OFFSET :offset) hits "
+            f"ORDER BY hits.score DESC"
+        )
+        rows = db.execute(text(sql), params).fetchall()
+        return [SearchHit(row[0], float(row[1]), row[2]) for row in rows]
+
+
+def ensure_fulltext_indexes(engine: Engine):
+    """Create every registered full-text index"""
+    for index in FULLTEXT_INDEXES:
+        index.ensure(engine)
@@ -0,0 +1,67 @@
+import json
+import base64
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, List, Sequence
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque, URL-safe token for the sort key of the last row on a page"""
+    encoded = []
+    for value in values:
+        if isinstance(value, datetime):
+            encoded.append({"dt": value.isoformat()})
+        elif isinstance(value, Decimal):
+            encoded.append({"dec": str(value)})
+        else:
+            encoded.append(value)
+    raw = json.dumps(encoded, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> List[Any]:
+    """Sort key values from a cursor token; 400 if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        encoded = json.loads(raw)
+        if not isinstance(encoded, list) or len(encoded) != size:
+            raise ValueError("wrong cursor size")
+        values = []
+        for value in encoded:
+            if isinstance(value, dict) and "dt" in value:
+                values.append(datetime.fromisoformat(value["dt"]))
+            elif isinstance(value, dict) and "dec" in value:
+                values.append(Decimal(value["dec"]))
+            else:
+                values.append(value)
+        return values
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _sqlite_datetime(value: datetime) -> str:
+    # SQLite stores datetimes as text: CURRENT_TIMESTAMP defaults without fractional
+    # seconds, SQLAlchemy writes with them. Compare in the stored format so equal
+    # timestamps compare equal.
+    if value.microsecond:
+        return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def keyset_after(columns: Sequence[Any], values: Sequence[Any], descending: bool = True, dialect: str = None):
+    """Filter for rows strictly after `values` in (columns...) order.
+    
+    Expands to (c1 < v1) OR (c1 = v1 AND c2 < v2) ..., which an index on
+    the same columns can answer with a range scan. Pass the session's
+    dialect name so SQLite datetimes are compared correctly.
+    """
+    if dialect == "sqlite":
+        values = [_sqlite_datetime(value) if isinstance(value, datetime) else value for value in values]
+    
+    clauses = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        beyond = column < value if descending else column > value
+        clauses.append(and_(*[c == v for c, v in zip(columns[:i], values[:i])], beyond))
+    return or_(*clauses)
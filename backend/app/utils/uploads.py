@@ -0,0 +1,53 @@
+import os
+import hashlib
+from typing import NamedTuple
+import aiofiles
+from fastapi import HTTPException, UploadFile
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+
+class SavedUpload(NamedTuple):
+    path: str
+    size: int  # bytes
+    sha256: str
+
+
+async def save_upload_file(
+    file: UploadFile,
+    destination: str,
+    max_bytes: int,
+    chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> SavedUpload:
+    """Stream an upload to disk in fixed-size chunks.
+    
+    Memory use is one chunk regardless of file size. The size limit is
+    enforced while streaming and the SHA-256 is computed on the fly. The
+    file is written to a `.part` path and only moved into place once
+    complete, so a rejected or interrupted upload leaves nothing behind.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    partial_path = f"{destination}.part"
+    
+    try:
+        async with aiofiles.open(partial_path, "wb") as out:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File too large. Maximum size is {max_bytes / (1024 * 1024):g} MB"
+                    )
+                digest.update(chunk)
+                await out.write(chunk)
+        os.replace(partial_path, destination)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    
+    return SavedUpload(path=destination, size=size, sha256=digest.hexdigest())
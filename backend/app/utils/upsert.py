@@ -0,0 +1,29 @@
+from typing import Any, Dict, List
+from sqlalchemy.orm import Session
+
+
+def upsert(db: Session, model, rows: List[Dict], key_columns: List[str], extra_updates: Dict[str, Any] = None):
+    """Insert rows, updating the existing row instead when the key already exists (caller commits).
+    
+    Uses INSERT ... ON CONFLICT DO UPDATE on SQLite and PostgreSQL, so two
+    sessions writing the same key don't fail with an IntegrityError; other
+    databases fall back to Session.merge.
+    """
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        statement = insert(model).values(rows)
+        updates = {column: statement.excluded[column] for column in rows[0] if column not in key_columns}
+        updates.update(extra_updates or {})
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[getattr(model, column) for column in key_columns],
+            set_=updates
+        ))
+    else:
+        for row in rows:
+            db.merge(model(**row))
@@ -0,0 +1,81 @@
+"""
+Benchmark quantized buddy-matching embeddings against the float32 baseline
+
+Reports memory, query latency and recall@k of the memory-mapped float16/int8
+matrices versus exact float32 search (the BruteForceIndex used by
+BuddyMatchingService). Uses the stored profile embeddings, or synthetic
+clustered vectors with --synthetic N.
+"""
+import sys
+import os
+import time
+import argparse
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+
+def load_vectors(synthetic: int, dimension: int = 384):
+    if synthetic:
+        rng = np.random.default_rng(0)
+        centers = rng.normal(size=(max(1, synthetic // 200), dimension))
+        labels = rng.integers(0, len(centers), synthetic)
+        vectors = centers[labels] + 0.6 * rng.normal(size=(synthetic, dimension))
+        return np.arange(1, synthetic + 1), vectors.astype(np.float32)
+    
+    from app.database import SessionLocal
+    from app.models.user_embedding import UserEmbedding
+    db = SessionLocal()
+    try:
+        rows = db.query(UserEmbedding.user_id, UserEmbedding.embedding).all()
+    finally:
+        db.close()
+    if not rows:
+        raise SystemExit("No stored embeddings found; run with --synthetic N")
+    ids = np.asarray([row.user_id for row in rows], dtype=np.int64)
+    return ids, np.vstack([np.frombuffer(row.embedding, dtype=np.float32) for row in rows])
+
+
+def benchmark(synthetic: int, queries: int, k: int):
+    from app.services.vector_index import BruteForceIndex, MemmapIndex
+    
+    ids, vectors = load_vectors(synthetic)
+    versions = [""] * len(ids)
+    rng = np.random.default_rng(1)
+    query_vectors = vectors[rng.choice(len(vectors), size=min(queries, len(vectors)), replace=False)]
+    
+    baseline = BruteForceIndex(vectors.shape[1])
+    baseline.upsert_many(ids.tolist(), vectors, versions)
+    
+    def run(index):
+        results = []
+        started = time.perf_counter()
+        for query in query_vectors:
+            results.append(set(index.search(query, k)[0].tolist()))
+        return results, (time.perf_counter() - started) / len(query_vectors) * 1000
+    
+    exact, baseline_ms = run(baseline)
+    print(f"{len(ids)} vectors x {vectors.shape[1]} dims, {len(query_vectors)} queries, k={k}\n")
+    print(f"{'dtype':<10}{'matrix MB':>12}{'ms/query':>12}{'recall@' + str(k):>12}")
+    print(f"{'float32':<10}{baseline.vectors.nbytes / 1e6:>12.1f}{baseline_ms:>12.2f}{1.0:>12.4f}")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        for dtype in ("float16", "int8"):
+            index = MemmapIndex(vectors.shape[1], dtype=dtype)
+            index.upsert_many(ids.tolist(), vectors, versions)
+            index.save(os.path.join(directory, f"bench_{dtype}.npz"))
+            
+            results, ms = run(index)
+            recall = np.mean([len(got & want) / len(want) for got, want in zip(results, exact) if want])
+            print(f"{dtype:<10}{index.nbytes / 1e6:>12.1f}{ms:>12.2f}{recall:>12.4f}")
+            del index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark quantized buddy embeddings")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N synthetic vectors instead of the DB")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+    benchmark(args.synthetic, args.queries, args.k)
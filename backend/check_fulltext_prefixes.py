@@ -0,0 +1,56 @@
+"""
+Check that marketplace type-ahead search matches every prefix of stemmed words
+
+The main full-text index stores stemmed terms ("operating" -> "oper"), so
+prefixes such as "opera" need the unstemmed prefix index. This searches an
+in-memory SQLite copy of the schema for every prefix of every word in a few
+titles and exits non-zero if any of them misses.
+"""
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base, SessionLocal
+import app.models  # noqa: F401 - register models before creating tables
+from app.models.resource import Resource, resource_search
+from app.services.resource_service import ResourceService
+
+TITLES = ["Operating Systems", "Studies in Probability", "Sorting Algorithms", "Running Time Analysis"]
+
+
+def check_fulltext_prefixes(verbose: bool = False) -> int:
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    resource_search.ensure(engine)
+    SessionLocal.configure(bind=engine)
+    db = SessionLocal()
+    
+    db.add_all([Resource(user_id=1, title=title, subject="Computer Science") for title in TITLES])
+    db.commit()
+    
+    failures = 0
+    for title in TITLES:
+        for word in title.split():
+            for length in range(1, len(word) + 1):
+                prefix = word[:length]
+                titles = [resource.title for resource in ResourceService.search_resources(db, prefix, limit=50)]
+                found = title in titles
+                if not found:
+                    failures += 1
+                if verbose or not found:
+                    print(f"{'✅' if found else '❌'} {prefix!r} -> {titles}")
+    
+    db.close()
+    print(f"\n{failures} prefix{'' if failures == 1 else 'es'} without a match")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check full-text prefix search on stemmed words")
+    parser.add_argument("--verbose", action="store_true", help="Print every prefix checked")
+    args = parser.parse_args()
+    sys.exit(1 if check_fulltext_prefixes(args.verbose) else 0)
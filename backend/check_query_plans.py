@@ -0,0 +1,108 @@
+"""
+Check that the marketplace's hot queries are answered from indexes
+
+Runs the ResourceService read paths against a throwaway in-memory SQLite
+database built from the models, then EXPLAIN QUERY PLANs every SELECT they
+issue. Exits non-zero if any of them scans a whole table, so it can run in CI
+after model or query changes.
+"""
+import re
+import sys
+import os
+import argparse
+from decimal import Decimal
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base, SessionLocal
+import app.models  # noqa: F401 - register models before creating tables
+from app.models.resource import Resource
+from app.models.resource_unit import ResourceUnit
+from app.models.purchase import Purchase  # noqa: F401
+from app.models.review import Review  # noqa: F401
+from app.models.wallet import Wallet
+from app.services.resource_service import ResourceService
+
+# "SCAN resources" (or "SCAN TABLE resources" on older SQLite) reads every row;
+# "SCAN ... USING INDEX" and "SEARCH ..." don't
+TABLE_SCAN = re.compile(r"^SCAN (TABLE )?\w+( AS \w+)?$")
+
+
+def seed(db: Session):
+    resource = Resource(user_id=1, title="Operating Systems", subject="Computer Science")
+    db.add(resource)
+    db.flush()
+    db.add_all([
+        ResourceUnit(resource_id=resource.id, unit_number=1, title="Unit 1", file_path="u1.pdf",
+                     file_name="u1.pdf", price=Decimal("0.00"), is_free=True),
+        ResourceUnit(resource_id=resource.id, unit_number=2, title="Unit 2", file_path="u2.pdf",
+                     file_name="u2.pdf", price=Decimal("2.00")),
+        Wallet(user_id=1, balance=Decimal("0.00"), total_earned=Decimal("0.00"))
+    ])
+    db.commit()
+    return resource
+
+
+def hot_queries(db: Session, resource: Resource):
+    """(label, callable) for each marketplace code path worth checking"""
+    paid_unit = db.query(ResourceUnit).filter(ResourceUnit.unit_number == 2).first()
+    return [
+        ("browse (recent)", lambda: ResourceService.browse_resources(db, sort_by="recent")),
+        ("browse (popular)", lambda: ResourceService.browse_resources(db, sort_by="popular")),
+        ("browse (rating)", lambda: ResourceService.browse_resources(db, sort_by="rating")),
+        ("unit listing", lambda: ResourceService.get_resource_units(db, resource.id)),
+        ("download access check", lambda: ResourceService.check_unit_access(db, 2, paid_unit.id)),
+        ("purchase", lambda: ResourceService.purchase_unit(db, 2, paid_unit.id, "demo", "check_plan_1")),
+        ("purchase history", lambda: ResourceService.get_user_purchases(db, 2)),
+        ("add review", lambda: ResourceService.add_review(db, 2, resource.id, 5)),
+        ("review page", lambda: ResourceService.get_resource_reviews(db, resource.id)),
+        ("seller uploads", lambda: ResourceService.get_user_uploads(db, 1)),
+    ]
+
+
+def check_query_plans(verbose: bool = False) -> int:
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    # Services that open their own sessions (e.g. the download counter) use this database too
+    SessionLocal.configure(bind=engine)
+    db = SessionLocal()
+    resource = seed(db)
+    
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+    
+    failures = 0
+    for label, run in hot_queries(db, resource):
+        statements.clear()
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            run()
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        
+        for statement, parameters in list(statements):
+            plan = [row[3] for row in db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            scans = [step for step in plan if TABLE_SCAN.match(step)]
+            if scans:
+                failures += 1
+            status = "❌" if scans else "✅"
+            print(f"{status} {label}: {'; '.join(plan)}")
+            if verbose or scans:
+                print(f"    {' '.join(statement.split())}")
+    
+    db.close()
+    print(f"\n{failures} quer{'y' if failures == 1 else 'ies'} with table scans")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check marketplace query plans for table scans")
+    parser.add_argument("--verbose", action="store_true", help="Print every SQL statement")
+    args = parser.parse_args()
+    sys.exit(1 if check_query_plans(args.verbose) else 0)
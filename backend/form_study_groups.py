@@ -0,0 +1,40 @@
+"""
+Script to form study groups from student profiles
+
+Clusters students taking the same subject by profile embedding and writes
+StudyGroup rows. Profiles without a stored embedding are skipped; run
+reembed_profiles.py first after a bulk import.
+"""
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal, init_db
+import app.models  # noqa: F401 - register models before creating tables
+from app.services.study_group_service import StudyGroupService
+
+
+def form_study_groups(max_size: int, min_size: int, keep_existing: bool):
+    init_db()
+    db = SessionLocal()
+    
+    print("Forming study groups...")
+    try:
+        metrics = StudyGroupService.form_groups(
+            db, max_size=max_size, min_size=min_size, replace=not keep_existing
+        )
+    finally:
+        db.close()
+    
+    print(f"\n✅ Created {metrics['groups']} groups across {metrics['subjects']} subjects "
+          f"from {metrics['users']} students in {metrics['seconds']}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Form study groups from student profiles")
+    parser.add_argument("--max-size", type=int, default=5, help="Largest group size")
+    parser.add_argument("--min-size", type=int, default=2, help="Smaller leftover groups are dropped")
+    parser.add_argument("--keep-existing", action="store_true", help="Don't replace existing groups")
+    args = parser.parse_args()
+    form_study_groups(args.max_size, args.min_size, args.keep_existing)
@@ -0,0 +1,37 @@
+"""
+Script to precompute study buddy candidates for every user
+
+Run periodically (e.g. from cron) so /api/buddy/find-matches can read
+candidates instead of searching the index inside the request.
+"""
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal, init_db
+import app.models  # noqa: F401 - register models before creating tables
+from app.services.buddy_recommendation_service import BuddyRecommendationService
+
+
+def precompute_buddy_candidates(top_k: int = None, batch_size: int = 500):
+    init_db()
+    db = SessionLocal()
+    
+    print("Precomputing study buddy candidates...")
+    try:
+        metrics = BuddyRecommendationService.recompute_all(db, top_k=top_k, batch_size=batch_size)
+    finally:
+        db.close()
+    
+    print(f"\n✅ Precomputed {metrics['candidates']} candidates for {metrics['users']} users")
+    print(f"Total: {metrics['seconds']}s (search {metrics['search_seconds']}s, write {metrics['write_seconds']}s)")
+    print(f"Throughput: {metrics['users_per_second']} users/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute study buddy candidates")
+    parser.add_argument("--top-k", type=int, default=None, help="Candidates kept per user")
+    parser.add_argument("--batch-size", type=int, default=500, help="Users per batch")
+    args = parser.parse_args()
+    precompute_buddy_candidates(args.top_k, args.batch_size)
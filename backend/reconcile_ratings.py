@@ -0,0 +1,38 @@
+"""
+Script to reconcile resource rating stats with their reviews
+
+add_review keeps each resource's rating sum, review count and average up to
+date incrementally. Run this periodically (e.g. nightly from cron) to recompute
+them from the reviews table and repair any drift.
+"""
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal, init_db
+import app.models  # noqa: F401 - register models before creating tables
+from app.models.resource import Resource  # noqa: F401
+from app.models.review import Review  # noqa: F401
+from app.services.resource_service import ResourceService
+
+
+def reconcile_ratings(batch_size: int = 500, dry_run: bool = False):
+    init_db()
+    db = SessionLocal()
+    
+    print("Reconciling resource rating stats...")
+    try:
+        metrics = ResourceService.reconcile_rating_stats(db, batch_size=batch_size, fix=not dry_run)
+    finally:
+        db.close()
+    
+    print(f"\n✅ Checked {metrics['resources']} resources: {metrics['drifted']} drifted, {metrics['fixed']} fixed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile resource rating stats")
+    parser.add_argument("--batch-size", type=int, default=500, help="Resources per batch")
+    parser.add_argument("--dry-run", action="store_true", help="Report drift without fixing it")
+    args = parser.parse_args()
+    reconcile_ratings(args.batch_size, args.dry_run)
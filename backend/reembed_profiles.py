@@ -0,0 +1,37 @@
+"""
+Script to re-embed study profiles in bulk (e.g. after a bulk import or at semester start)
+"""
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal, init_db
+import app.models  # noqa: F401 - register models before creating tables
+from app.services.reembedding_service import ReembeddingService
+
+
+def reembed_profiles(chunk_size: int, batch_size: int, workers: int, force: bool):
+    init_db()
+    db = SessionLocal()
+    
+    print("Re-embedding study profiles...")
+    try:
+        metrics = ReembeddingService.reembed_all(
+            db, chunk_size=chunk_size, batch_size=batch_size, workers=workers, force=force
+        )
+    finally:
+        db.close()
+    
+    print(f"\n✅ Encoded {metrics['encoded']} of {metrics['scanned']} profiles with {metrics['workers']} workers")
+    print(f"Total: {metrics['seconds']}s ({metrics['profiles_per_second']} profiles/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-embed study profiles in bulk")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Users read from the DB per chunk")
+    parser.add_argument("--batch-size", type=int, default=64, help="Texts per model.encode batch")
+    parser.add_argument("--workers", type=int, default=None, help="Encoder processes (default: all CPU cores)")
+    parser.add_argument("--force", action="store_true", help="Re-embed unchanged profiles too")
+    args = parser.parse_args()
+    reembed_profiles(args.chunk_size, args.batch_size, args.workers, args.force)
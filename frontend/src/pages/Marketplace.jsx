@@ -9,21 +9,28 @@ const Marketplace = () => {
     const [searchTerm, setSearchTerm] = useState('');
     const [selectedSubject, setSelectedSubject] = useState('');
     const [sortBy, setSortBy] = useState('recent');
+    const [nextCursor, setNextCursor] = useState(null);
 
     useEffect(() => {
         fetchResources();
     }, [selectedSubject, sortBy]);
 
+    const buildParams = () => {
+        const params = new URLSearchParams();
+        if (selectedSubject) params.append('subject', selectedSubject);
+        if (sortBy) params.append('sort_by', sortBy);
+        if (searchTerm) params.append('search', searchTerm);
+        return params;
+    };
+
     const fetchResources = async () => {
         try {
             setLoading(true);
-            const params = new URLSearchParams();
-            if (selectedSubject) params.append('subject', selectedSubject);
-            if (sortBy) params.append('sort_by', sortBy);
-            if (searchTerm) params.append('search', searchTerm);
+            const params = buildParams();
 
             const res = await api.get(`/api/marketplace/resources?${params.toString()}`);
             setResources(res.data);
+            setNextCursor(res.headers['x-next-cursor'] || null);
         } catch (error) {
             console.error('Error fetching resources:', error);
         } finally {
@@ -31,6 +38,20 @@ const Marketplace = () => {
         }
     };
 
+    const loadMoreResources = async () => {
+        if (!nextCursor) return;
+        try {
+            const params = buildParams();
+            params.append('cursor', nextCursor);
+
+            const res = await api.get(`/api/marketplace/resources?${params.toString()}`);
+            setResources(prev => [...prev, ...res.data]);
+            setNextCursor(res.headers['x-next-cursor'] || null);
+        } catch (error) {
+            console.error('Error fetching resources:', error);
+        }
+    };
+
     const handleSearch = (e) => {
         e.preventDefault();
         fetchResources();
@@ -209,6 +230,14 @@ const Marketplace = () => {
                         ))}
                     </div>
                 )}
+
+                {!loading && nextCursor && (
+                    <div className="text-center" style={{ marginTop: '2rem' }}>
+                        <button className="btn btn-outline" onClick={loadMoreResources}>
+                            Load more
+                        </button>
+                    </div>
+                )}
             </div>
         </div>
     );
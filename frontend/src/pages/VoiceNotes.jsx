@@ -5,6 +5,7 @@ import { FaArrowLeft, FaMicrophone, FaUpload, FaSearch, FaStop, FaPlay, FaPause
 
 const VoiceNotes = () => {
     const [notes, setNotes] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
     const [selectedFile, setSelectedFile] = useState(null);
     const [uploading, setUploading] = useState(false);
     const [searchQuery, setSearchQuery] = useState('');
@@ -23,6 +24,29 @@ const VoiceNotes = () => {
         fetchNotes();
     }, []);
 
+    // Poll the notes still being transcribed in the background and merge their
+    // updates in place, so pages loaded with "Load more" and the cursor are kept
+    const pendingIds = notes
+        .filter(note => note.status === 'pending' || note.status === 'processing')
+        .map(note => note.id)
+        .join(',');
+    useEffect(() => {
+        if (!pendingIds) return;
+        const refreshPendingNotes = async () => {
+            try {
+                const updates = await Promise.all(
+                    pendingIds.split(',').map(id => api.get(`/api/voice/${id}`).then(res => res.data))
+                );
+                const updatesById = Object.fromEntries(updates.map(note => [note.id, note]));
+                setNotes(prev => prev.map(note => updatesById[note.id] ? { ...note, ...updatesById[note.id] } : note));
+            } catch (error) {
+                console.error('Error refreshing notes:', error);
+            }
+        };
+        const poll = setInterval(refreshPendingNotes, 5000);
+        return () => clearInterval(poll);
+    }, [pendingIds]);
+
     useEffect(() => {
         // Timer for recording
         if (isRecording && !isPaused) {
@@ -45,6 +69,18 @@ const VoiceNotes = () => {
         try {
             const res = await api.get('/api/voice/library');
             setNotes(res.data);
+            setNextCursor(res.headers['x-next-cursor'] || null);
+        } catch (error) {
+            console.error('Error fetching notes:', error);
+        }
+    };
+
+    const loadMoreNotes = async () => {
+        if (!nextCursor) return;
+        try {
+            const res = await api.get('/api/voice/library', { params: { cursor: nextCursor } });
+            setNotes(prev => [...prev, ...res.data]);
+            setNextCursor(res.headers['x-next-cursor'] || null);
         } catch (error) {
             console.error('Error fetching notes:', error);
         }
@@ -127,7 +163,7 @@ const VoiceNotes = () => {
             console.log('Upload successful:', response.data);
             setAudioBlob(null);
             await fetchNotes();
-            alert('✅ Recording uploaded and transcribed successfully!');
+            alert('✅ Recording uploaded! Transcription is running in the background.');
         } catch (error) {
             console.error('Error uploading recording:', error);
             console.error('Error response:', error.response?.data);
@@ -353,6 +389,10 @@ const VoiceNotes = () => {
                                 {new Date(note.created_at).toLocaleDateString()}
                             </p>
 
+                            {(note.status === 'pending' || note.status === 'processing') && (
+                                <p style={{ color: '#64748b', marginBottom: '1rem' }}>⏳ Transcribing and summarizing...</p>
+                            )}
+
                             {note.summary && (
                                 <div style={{ marginBottom: '1rem' }}>
                                     <strong style={{ color: '#1e293b' }}>Summary:</strong>
@@ -373,6 +413,12 @@ const VoiceNotes = () => {
                         </div>
                     ))}
 
+                    {nextCursor && (
+                        <button className="btn btn-outline" onClick={loadMoreNotes}>
+                            Load more
+                        </button>
+                    )}
+
                     {filteredNotes.length === 0 && (
                         <div className="glass-card text-center" style={{ background: 'white', padding: '3rem', borderRadius: '12px' }}>
                             <p style={{ color: '#64748b', fontSize: '1.1rem' }}>